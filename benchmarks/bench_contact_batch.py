@@ -0,0 +1,67 @@
+# bench_contact_batch.py
+#
+# Window and sent-today selection with ContactBatch (needs NumPy). Run with:
+#     $ python benchmarks/bench_contact_batch.py
+#
+# Compares the vectorized masks with a Python loop over Contact objects at
+# 10k, 1M and 10M contacts. The loop is skipped at 10M, where building ten
+# million Contact objects alone takes minutes.
+
+import time
+from datetime import datetime
+
+import numpy as np
+
+from morning_greetings.contact_batch import ContactBatch
+from morning_greetings.contacts import Contact, minutes_to_time
+from morning_greetings.sent_index import SentIndex
+
+SIZES = [10_000, 1_000_000, 10_000_000]
+LOOP_LIMIT = 1_000_000
+
+
+def python_loop(contacts: list[Contact], now: datetime, sent: set[str]) -> int:
+    """Counts due contacts the way a plain loop would, with the same wrapping window."""
+    seconds = now.hour * 3600 + now.minute * 60 + now.second + now.microsecond / 1e6
+    count = 0
+    for c in contacts:
+        ahead = (c.preferred_minutes * 60 - seconds) % 86400
+        if (ahead <= 900 or ahead >= 86400 - 900) and c.email not in sent:
+            count += 1
+    return count
+
+
+def main():
+    now = datetime.now()
+    rng = np.random.default_rng(0)
+    print(f"{'contacts':>10} {'vectorized':>12} {'python loop':>12}")
+
+    for n in SIZES:
+        emails = np.array([f"contact{i}@example.com" for i in range(n)], dtype=object)
+        names = np.array([f"Contact {i % 1000}" for i in range(n)], dtype=object)
+        minutes = rng.integers(0, 24 * 60, size=n, dtype=np.int16)
+        batch = ContactBatch(names, emails, minutes)
+
+        # Mark every tenth contact as already messaged today
+        sent_index = SentIndex(log_path="/nonexistent", index_path="/nonexistent")
+        for email in emails[::10]:
+            sent_index.add(email, now.date(), now.timestamp())
+
+        start = time.perf_counter()
+        due = batch.due(sent_index, now)
+        vectorized = time.perf_counter() - start
+
+        loop = "-"
+        if n <= LOOP_LIMIT:
+            contacts = [Contact(name, email, minutes_to_time(m))
+                        for name, email, m in zip(names, emails, minutes.tolist())]
+            start = time.perf_counter()
+            count = python_loop(contacts, now, sent_index.emails_on(now.date()))
+            loop = f"{time.perf_counter() - start:.4f}s"
+            assert count == len(due)
+
+        print(f"{n:>10} {vectorized:>11.4f}s {loop:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# bench_contact_memory.py
+#
+# Memory and construction throughput of Contact. Run with:
+#     $ python benchmarks/bench_contact_memory.py [contacts]
+#
+# Compares the slotted Contact with the original dict-based class, which parsed
+# the time with strptime and matched an uncompiled email regex on every call.
+
+import re
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from morning_greetings.contacts import Contact
+
+
+class LegacyContact:
+    """The original implementation, kept here for comparison."""
+
+    def __init__(self, name: str, email: str, preferred_time: str = "08:00 AM"):
+        self.name = self.validate_name(name)
+        self.email = self.validate_email(email)
+        self.preferred_time = self.validate_time(preferred_time)
+
+    def validate_name(self, name: str) -> str:
+        if not isinstance(name, str) or not name.strip():
+            raise ValueError("Name must be a non-empty string.")
+        return name.strip()
+
+    def validate_email(self, email: str) -> str:
+        email_regex = r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)"
+        if not re.match(email_regex, email):
+            raise ValueError(f"Invalid email address: {email}")
+        return email
+
+    def validate_time(self, time_str: str) -> str:
+        try:
+            datetime.strptime(time_str, "%I:%M %p")
+            return time_str
+        except ValueError:
+            raise ValueError(f"Invalid time format: {time_str}. Expected HH:MM AM/PM (12-hour).")
+
+
+def measure(cls, rows: list[tuple[str, str, str]]) -> None:
+    # Timed without tracemalloc, which slows down allocation a lot
+    start = time.perf_counter()
+    contacts = [cls(name, email, preferred_time) for name, email, preferred_time in rows]
+    elapsed = time.perf_counter() - start
+    del contacts
+
+    tracemalloc.start()
+    contacts = [cls(name, email, preferred_time) for name, email, preferred_time in rows]
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    n = len(contacts)
+    print(f"{cls.__name__:<16} {elapsed:>8.3f}s {n / elapsed:>12,.0f} contacts/s {memory / n:>8.1f} bytes/contact")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    # Strings are created up front so only the contact objects themselves are measured
+    rows = [
+        (f"Contact {i}", f"contact{i}@example.com", f"{i % 12 + 1:02d}:{i % 60:02d} {'AM' if i % 2 else 'PM'}")
+        for i in range(n)
+    ]
+    measure(LegacyContact, rows)
+    measure(Contact, rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+# bench_contacts.py
+#
+# Bulk-import benchmark for ContactList. Run with:
+#     $ python benchmarks/bench_contacts.py [max_contacts]
+#
+# The time per contact should stay roughly flat as the list grows; a quadratic
+# implementation shows up as the per-contact time growing with N.
+
+import sys
+import time
+
+from morning_greetings.contacts import ContactList
+
+
+def bulk_import(n: int) -> float:
+    """Adds n contacts to an empty ContactList and returns the elapsed seconds."""
+    contacts = ContactList()
+    start = time.perf_counter()
+    for i in range(n):
+        contacts.add_contact(f"Contact {i % 1000}", f"contact{i}@example.com", "08:00 AM")
+    return time.perf_counter() - start
+
+
+def main():
+    max_n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    n = 1_000
+    print(f"{'contacts':>10} {'seconds':>10} {'us/contact':>12}")
+    while n <= max_n:
+        elapsed = bulk_import(n)
+        print(f"{n:>10} {elapsed:>10.3f} {elapsed / n * 1e6:>12.2f}")
+        n *= 10
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# bench_messages.py
+#
+# Microbenchmark for message generation. Run with:
+#     $ python benchmarks/bench_messages.py [contacts]
+#
+# Compares the original strptime-based generator with the compiled templates,
+# one contact at a time and as a batch.
+
+import sys
+import time
+from datetime import datetime
+
+from morning_greetings.contacts import Contact
+from morning_greetings.message_generator import generate_messages, message_generator
+
+
+def legacy_message_generator(c: Contact):
+    """The original implementation, kept here for comparison."""
+    time = datetime.strptime(c.preferred_time, "%I:%M %p")
+    hour = time.hour
+    if 5 <= hour < 12:
+        return f"Good morning {c.name}, hope you have a great day!"
+    elif 12 <= hour < 18:
+        return f"Good afternoon {c.name}, hope you're having a productive day!"
+    else:
+        return f"Good evening {c.name}, hope you're winding down and relaxing!"
+
+
+def timed(label: str, func, n: int) -> list[str]:
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed:>8.3f}s {elapsed / n * 1e6:>8.2f} us/message")
+    return result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    contacts = [
+        Contact(f"Contact {i}", f"contact{i}@example.com", f"{i % 12 + 1:02d}:{i % 60:02d} {'AM' if i % 2 else 'PM'}")
+        for i in range(n)
+    ]
+
+    legacy = timed("legacy (strptime per call)", lambda: [legacy_message_generator(c) for c in contacts], n)
+    single = timed("message_generator", lambda: [message_generator(c) for c in contacts], n)
+    batch = timed("generate_messages (batch)", lambda: generate_messages(contacts), n)
+    assert legacy == single == batch
+
+
+if __name__ == "__main__":
+    main()
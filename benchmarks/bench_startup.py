@@ -0,0 +1,42 @@
+# bench_startup.py
+#
+# Start-up time of the morning_greetings command. Run with:
+#     $ python benchmarks/bench_startup.py [runs]
+#
+# Each command is started as a new process, the way cron or systemd would run
+# it, and the median wall time is reported next to a bare Python start-up.
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+COMMANDS = [
+    ("python (baseline)", ["-c", "pass"]),
+    ("import morning_greetings.cli", ["-c", "import morning_greetings.cli"]),
+    ("import morning_greetings.main", ["-c", "import morning_greetings.main"]),
+    ("morning_greetings --help", ["-m", "morning_greetings", "--help"]),
+    ("morning_greetings logs", ["-m", "morning_greetings", "logs"]),
+    ("morning_greetings send --due", ["-m", "morning_greetings", "send", "--due"]),
+]
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    # Run in an empty directory so the commands don't touch a real log or contacts database
+    with tempfile.TemporaryDirectory() as workdir:
+        print(f"{'command':<32} {'median ms':>10}")
+        for label, args in COMMANDS:
+            times = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, *args], cwd=workdir, env=os.environ,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+                times.append(time.perf_counter() - start)
+            print(f"{label:<32} {statistics.median(times) * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# conftest.py
+#
+# Shared fixtures for the pytest-benchmark suite. Sizes are set with environment
+# variables, so the default run stays short and the full 10^3-10^6 range is one
+# variable away:
+#     MORNING_GREETINGS_BENCH_MAX_CONTACTS  largest contact list (default 10000)
+#     MORNING_GREETINGS_BENCH_LOG_DAYS      days of log history (default 90)
+#     MORNING_GREETINGS_BENCH_LOG_PER_DAY   log records per day (default 1000)
+
+import os
+
+import pytest
+
+from morning_greetings import logger, sent_index
+from synthetic import contact_rows, make_contact_list, write_log
+
+MAX_CONTACTS = int(os.environ.get("MORNING_GREETINGS_BENCH_MAX_CONTACTS", "10000"))
+LOG_DAYS = int(os.environ.get("MORNING_GREETINGS_BENCH_LOG_DAYS", "90"))
+LOG_PER_DAY = int(os.environ.get("MORNING_GREETINGS_BENCH_LOG_PER_DAY", "1000"))
+
+# Powers of ten from 10^3 up to the maximum
+SIZES = [10 ** k for k in range(3, 7) if 10 ** k <= MAX_CONTACTS] or [MAX_CONTACTS]
+
+_lists = {}
+
+
+def pytest_generate_tests(metafunc):
+    # Any benchmark taking an argument n runs once per contact list size
+    if "n" in metafunc.fixturenames:
+        metafunc.parametrize("n", SIZES)
+
+
+@pytest.fixture
+def contact_list(n):
+    """A ContactList of n synthetic contacts, built once per session. Benchmarks must not modify it."""
+    if n not in _lists:
+        _lists[n] = make_contact_list(contact_rows(n))
+    return _lists[n]
+
+
+def _reset_send_state() -> None:
+    # Starts over with an empty log, sent-index and ledger in the current directory
+    if logger._log_writer is not None:
+        logger._log_writer.close()
+    for path in ("log.txt", "log.txt.idx", "sent_index.json", "ledger.db", "ledger.db-wal", "ledger.db-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    logger._log_writer = logger.LogWriter(flush_size=10000)
+    sent_index._sent_index = None
+
+
+@pytest.fixture
+def reset_send_state(tmp_path, monkeypatch):
+    """Moves the test to an empty directory with its own log, sent-index and ledger, and returns a function
+    that empties them again, so every round of a send benchmark starts from nothing sent."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(logger, "_log_writer", None)
+    monkeypatch.setattr(sent_index, "_sent_index", None)
+    _reset_send_state()
+    yield _reset_send_state
+    logger._log_writer.close()
+
+
+@pytest.fixture(scope="session")
+def log_days():
+    """The number of days of history in log_dir."""
+    return LOG_DAYS
+
+
+@pytest.fixture(scope="session", params=["json", "legacy"])
+def log_dir(tmp_path_factory, request):
+    """A directory with LOG_DAYS days of log history ending today, written once per session in each
+    format: JSON lines in daily segments, and the old text lines in a single log."""
+    path = tmp_path_factory.mktemp(f"logs-{request.param}")
+    write_log(str(path / "log.txt"), LOG_DAYS, LOG_PER_DAY, legacy=request.param == "legacy")
+    return path
@@ -0,0 +1,89 @@
+# synthetic.py
+#
+# Generators for large, reproducible inputs used by the benchmark suite: contact
+# lists of any size and multi-month logs, either as LogWriter writes them today
+# or in the plain-text format of older installs.
+
+import random
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from morning_greetings.contacts import Contact, ContactList
+from morning_greetings.log_records import LogRecord, format_record
+from morning_greetings.log_segments import SegmentIndex
+from morning_greetings.logger import LogWriter
+from morning_greetings.transport import Transport
+
+FIRST_NAMES = ("Anna", "Bjorn", "Camilla", "Daniel", "Eva", "Fredrik", "Guro", "Henrik", "Ingrid", "Jens")
+LAST_NAMES = ("Hansen", "Johansen", "Olsen", "Larsen", "Andersen", "Pedersen", "Nilsen", "Kristiansen")
+TIMEZONES = (None, None, None, "Europe/Oslo", "America/New_York", "Asia/Tokyo")
+
+
+class NullTransport(Transport):
+    """Accepts every message and does nothing, so a send pass measures the pipeline and not delivery."""
+
+    def send(self, c: Contact, msg: str) -> None:
+        pass
+
+
+@lru_cache(maxsize=None)
+def contact_rows(n: int, seed: int = 0) -> list[tuple]:
+    """Returns n (name, email, preferred_time, timezone) rows with unique emails, the same for the same seed.
+    Results are cached, so callers must not modify them.
+
+    Names repeat, as they do in real address books, so name lookups return several contacts."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(n):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        hour, minute = rng.randrange(24), rng.randrange(0, 60, 5)
+        preferred_time = f"{hour % 12 or 12:02d}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+        rows.append((name, f"contact{i}@example.com", preferred_time, rng.choice(TIMEZONES)))
+    return rows
+
+
+def make_contact_list(rows: list[tuple]) -> ContactList:
+    """Returns a ContactList (without a store) holding the rows."""
+    contacts = ContactList()
+    for row in rows:
+        contacts.add_contact(*row)
+    return contacts
+
+
+def log_records(days: int, per_day: int, end: date = None, seed: int = 0):
+    """Yields per_day LogRecords for each of the days up to and including end (default today), oldest first."""
+    rng = random.Random(seed)
+    end = end or date.today()
+    step = 86400 / per_day
+    for d in range(days - 1, -1, -1):
+        midnight = datetime.combine(end - timedelta(days=d), datetime.min.time())
+        for j in range(per_day):
+            i = rng.randrange(per_day * 10)
+            when = midnight + timedelta(seconds=j * step)
+            yield LogRecord(when, f"Contact {i}", f"contact{i}@example.com", f"Good morning Contact {i}!")
+
+
+def write_log(path: str, days: int, per_day: int, end: date = None, seed: int = 0, legacy: bool = False) -> int:
+    """Writes per_day log records for each of the days up to and including end (default today) to the log at
+    path, through LogWriter with daily rotation, so it leaves dated segments, their indexes and an active log
+    just like a long-running install. Returns the number of records written.
+
+    With legacy, the records are written as the old "YYYY-MM-DD HH:MM:SS.ffffff - Sent to Name (email): message"
+    lines instead, all in the one log file the way installs from before rotation have them, and indexed."""
+    count = 0
+    if legacy:
+        with open(path, "w", encoding="utf-8") as f:
+            for record in log_records(days, per_day, end, seed):
+                f.write(format_record(record) + "\n")
+                count += 1
+        SegmentIndex(path).refresh()
+        return count
+
+    writer = LogWriter(path, flush_size=10000, flush_interval=3600, rotate_daily=True)
+    try:
+        for record in log_records(days, per_day, end, seed):
+            writer.write(record)
+            count += 1
+    finally:
+        writer.close()
+    return count
@@ -0,0 +1,61 @@
+# test_bench_contacts.py
+#
+# ContactList add/find/remove at 10^3 and up. Lookups and removals are timed in
+# batches of LOOKUPS, so the numbers compare across list sizes: they should stay
+# flat as n grows.
+
+import random
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from morning_greetings.contacts import ContactList
+from synthetic import contact_rows, make_contact_list
+
+LOOKUPS = 1000
+
+
+def sample_emails(n: int) -> list[str]:
+    return [row[1] for row in random.Random(1).sample(contact_rows(n), min(LOOKUPS, n))]
+
+
+def test_add_contacts(benchmark, n):
+    rows = contact_rows(n)
+
+    def add_all(contacts):
+        for row in rows:
+            contacts.add_contact(*row)
+
+    benchmark.pedantic(add_all, setup=lambda: ((ContactList(),), {}), rounds=3)
+
+
+def test_find_by_email(benchmark, n, contact_list):
+    emails = sample_emails(n)
+
+    def find_all():
+        for email in emails:
+            contact_list.find_contact_by_email(email)
+
+    benchmark(find_all)
+
+
+def test_find_by_name(benchmark, n, contact_list):
+    names = [row[0].upper() for row in random.Random(1).sample(contact_rows(n), min(LOOKUPS, n))]
+
+    def find_all():
+        for name in names:
+            contact_list.find_contact_by_name(name, ignore_case=True)
+
+    benchmark(find_all)
+
+
+def test_remove_contacts(benchmark, n):
+    emails = sample_emails(n)
+
+    def remove_all(contacts):
+        for email in emails:
+            contacts.remove_contact(email)
+
+    # Each round removes from a freshly built list; building it is not timed
+    benchmark.pedantic(remove_all, setup=lambda: ((make_contact_list(contact_rows(n)),), {}), rounds=3)
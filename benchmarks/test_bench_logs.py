@@ -0,0 +1,44 @@
+# test_bench_logs.py
+#
+# Log queries against LOG_DAYS days of history, and the cold start of the
+# sent-index when it has to be rebuilt from the log. Each benchmark runs on a log
+# written by LogWriter (json) and on one with the old text lines (legacy).
+
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from morning_greetings import logger
+from morning_greetings.logger import print_logs, query_logs
+from morning_greetings.sent_index import SentIndex
+
+
+@pytest.fixture
+def in_log_dir(log_dir, monkeypatch):
+    monkeypatch.chdir(log_dir)
+    monkeypatch.setattr(logger, "_log_writer", None)
+    return log_dir
+
+
+@pytest.mark.parametrize("days", [1, 7, 30])
+def test_query_logs(benchmark, in_log_dir, days):
+    today = date.today()
+    start = today - timedelta(days=days - 1)
+    benchmark(lambda: sum(1 for _ in query_logs(start, today)))
+
+
+def test_query_logs_oldest_week(benchmark, in_log_dir, log_days):
+    # The first dated segments, so the query has to skip the rest rather than read them
+    first = date.today() - timedelta(days=log_days - 1)
+    benchmark(lambda: sum(1 for _ in query_logs(first, first + timedelta(days=6))))
+
+
+def test_print_logs(benchmark, in_log_dir, capsys):
+    benchmark(print_logs)
+
+
+def test_sent_index_rebuild(benchmark, in_log_dir, tmp_path):
+    # No saved index, so today's sends are read back from the log segments
+    benchmark(lambda: SentIndex("log.txt", str(tmp_path / "missing.json")))
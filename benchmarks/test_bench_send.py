@@ -0,0 +1,66 @@
+# test_bench_send.py
+#
+# Full send passes through send_messages with a transport that does nothing, plus
+# the per-contact pieces of a pass: the already-sent check and message generation.
+# Every send round starts from an empty log and sent-index.
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+from morning_greetings.contacts import Contact
+from morning_greetings.main import message_already_sent_today, send_messages
+from morning_greetings.message_generator import generate_messages, message_generator
+from morning_greetings.sent_index import get_sent_index
+from synthetic import NullTransport, contact_rows
+
+CONTACTS_PER_CALL = 1000
+
+
+def test_send_pass(benchmark, n, contact_list, reset_send_state):
+    contacts = contact_list.get_contacts()
+
+    def setup():
+        reset_send_state()
+        return (contacts, NullTransport()), {}
+
+    result = benchmark.pedantic(send_messages, setup=setup, rounds=3)
+    assert result["sent"] == n
+
+
+def test_send_pass_all_sent(benchmark, n, contact_list, reset_send_state):
+    # A second pass on the same day, where every contact is skipped by the already-sent check
+    contacts = contact_list.get_contacts()
+
+    def setup():
+        reset_send_state()
+        for c in contacts:
+            get_sent_index().add(c.email)
+        return (contacts, NullTransport()), {}
+
+    result = benchmark.pedantic(send_messages, setup=setup, rounds=3)
+    assert result["skipped"] == n
+
+
+def test_message_already_sent_today(benchmark, n, contact_list, reset_send_state):
+    contacts = contact_list.get_contacts()
+    sent_index = get_sent_index()
+    for c in contacts[::2]:
+        sent_index.add(c.email)
+    sample = contacts[:CONTACTS_PER_CALL]
+
+    def check_all():
+        for c in sample:
+            message_already_sent_today(c, sent_index)
+
+    benchmark(check_all)
+
+
+def test_message_generator(benchmark):
+    sample = [Contact(*row) for row in contact_rows(CONTACTS_PER_CALL)]
+    benchmark(lambda: [message_generator(c) for c in sample])
+
+
+def test_generate_messages(benchmark):
+    sample = [Contact(*row) for row in contact_rows(CONTACTS_PER_CALL)]
+    benchmark(generate_messages, sample)
@@ -0,0 +1,6 @@
+# __main__.py
+
+import sys
+from morning_greetings.cli import main
+
+sys.exit(main())
@@ -0,0 +1,232 @@
+# cli.py
+#
+# Entry point for the morning_greetings command. Without arguments it starts the
+# interactive menu; with a subcommand it runs once and prints a JSON summary, for
+# cron and systemd. Only argparse and json are imported up front, everything else
+# is imported by the subcommand that needs it so short runs start quickly.
+
+import argparse
+import json
+import sys
+
+EXIT_OK = 0
+EXIT_FAILED = 1  # some messages or rows failed
+EXIT_USAGE = 2   # argparse uses 2 for bad arguments
+EXIT_ERROR = 3   # the run could not complete
+
+
+def _load_contacts(db: str):
+    from morning_greetings.contacts import ContactList
+    from morning_greetings.storage import SQLiteContactStore
+    return ContactList(SQLiteContactStore(db))
+
+
+def cmd_send(args) -> tuple[dict, int]:
+    from morning_greetings.main import force_send_all, send_appropriate_messages
+
+    my_contacts = _load_contacts(args.db)
+    try:
+        if args.workers:
+            from morning_greetings.metrics import get_metrics
+            from morning_greetings.scheduler import SendScheduler
+            from morning_greetings.sent_index import get_sent_index
+            from morning_greetings.sharding import run_sharded
+
+            occurrences = None
+            if args.all:
+                contacts = my_contacts.get_contacts()
+            else:
+                with get_metrics().time("window_check"):
+                    sent_index = get_sent_index()
+                    sent_index.refresh()
+                    scheduler = SendScheduler(my_contacts)
+                    contacts = scheduler.due(sent_index=sent_index)
+                occurrences = scheduler.occurrences(contacts)
+                scheduler.close()
+            summary = run_sharded(contacts, args.workers, concurrency=args.concurrency or 8,
+                                  occurrences=occurrences)
+        elif args.all:
+            summary = force_send_all(my_contacts, concurrency=args.concurrency)
+        else:
+            summary = send_appropriate_messages(my_contacts, concurrency=args.concurrency)
+    finally:
+        my_contacts.store.close()
+    return summary, EXIT_FAILED if summary["failed"] else EXIT_OK
+
+
+def cmd_contacts_import(args) -> tuple[dict, int]:
+    from morning_greetings.storage import SQLiteContactStore, import_contacts
+
+    store = SQLiteContactStore(args.db)
+    try:
+        imported, rejected, errors = import_contacts(args.path, store, chunk_size=args.chunk_size)
+    finally:
+        store.close()
+    _resnapshot_journal(args.db)
+    summary = {
+        "imported": imported,
+        "rejected": rejected,
+        # Only the first few, a bad file can have millions of rejected rows
+        "errors": [{"line": line, "error": error} for line, error in errors],
+    }
+    return summary, EXIT_FAILED if rejected else EXIT_OK
+
+
+def _resnapshot_journal(db: str) -> None:
+    # Imports write straight to the store, so the change journal (if there is one) starts over
+    # from a snapshot and sync consumers pick up the imported contacts from it
+    import os
+    from morning_greetings.journal import ChangeJournal, journal_path
+
+    path = journal_path(db)
+    if not os.path.exists(path):
+        return
+    my_contacts = _load_contacts(db)
+    journal = ChangeJournal(path)
+    try:
+        journal.attach(my_contacts, resnapshot=True)
+    finally:
+        journal.close()
+        my_contacts.store.close()
+
+
+def cmd_contacts_changes(args) -> tuple[dict, int]:
+    from morning_greetings.journal import ChangeJournal, journal_path
+
+    my_contacts = _load_contacts(args.db)
+    journal = ChangeJournal(journal_path(args.db))
+    try:
+        journal.attach(my_contacts)
+        rows, changes, seq = journal.delta(args.since)
+    finally:
+        journal.close()
+        my_contacts.store.close()
+
+    # A consumer older than the snapshot gets the snapshot's contacts first, as "snapshot" lines
+    snapshot_seq = journal.snapshot_seq
+    for name, email, preferred_time, timezone in rows or ():
+        line = {"seq": snapshot_seq, "op": "snapshot", "email": email, "old_email": email,
+                "name": name, "preferred_time": preferred_time, "timezone": timezone}
+        args.out.write(json.dumps(line, ensure_ascii=False) + "\n")
+    for change in changes:
+        args.out.write(json.dumps(change._asdict(), ensure_ascii=False) + "\n")
+    return {"since": args.since, "seq": seq, "snapshot": rows is not None, "changes": len(changes)}, EXIT_OK
+
+
+def cmd_contacts_export(args) -> tuple[dict, int]:
+    from morning_greetings.storage import SQLiteContactStore, export_contacts
+
+    store = SQLiteContactStore(args.db)
+    try:
+        exported = export_contacts(args.path, store)
+    finally:
+        store.close()
+    return {"exported": exported}, EXIT_OK
+
+
+def cmd_logs(args) -> tuple[dict, int]:
+    from morning_greetings.log_records import to_json
+    from morning_greetings.logger import query_logs
+
+    count = 0
+    for record in query_logs(args.since, args.until):
+        # Records go to stdout, one JSON object per line
+        args.out.write(to_json(record) + "\n")
+        count += 1
+    return {"records": count}, EXIT_OK
+
+
+def _date(value: str):
+    from datetime import date
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date: {value} (expected YYYY-MM-DD)")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    from datetime import date, timedelta
+
+    parser = argparse.ArgumentParser(
+        prog="morning_greetings",
+        description="Send greetings to contacts. Run without a command for the interactive menu.",
+    )
+    parser.add_argument("--db", default="contacts.db", help="contacts database (default: contacts.db)")
+    parser.add_argument("--metrics", metavar="PATH",
+                        help="write stage timings and counters to PATH (JSON if it ends in .json, else Prometheus text)")
+    parser.add_argument("--profile", metavar="PATH",
+                        help="run under cProfile and tracemalloc and write a report to PATH (slow)")
+    commands = parser.add_subparsers(dest="command", metavar="command")
+
+    send = commands.add_parser("send", help="send messages and print a JSON summary")
+    which = send.add_mutually_exclusive_group(required=True)
+    which.add_argument("--due", action="store_true", help="only contacts whose preferred time is within 15 minutes")
+    which.add_argument("--all", action="store_true", help="all contacts regardless of preferred time")
+    send.add_argument("--concurrency", type=int, default=None, help="messages sent at the same time")
+    send.add_argument("--workers", type=int, default=None,
+                      help="send from this many processes, with each send claimed in ledger.db first")
+    send.set_defaults(func=cmd_send)
+
+    contacts = commands.add_parser("contacts", help="import or export contacts")
+    actions = contacts.add_subparsers(dest="action", metavar="action", required=True)
+    import_ = actions.add_parser("import", help="import contacts from a CSV or JSONL file")
+    import_.add_argument("path")
+    import_.add_argument("--chunk-size", type=int, default=10000, help="rows validated and written at a time")
+    import_.set_defaults(func=cmd_contacts_import)
+    export = actions.add_parser("export", help="export contacts to a CSV or JSONL file")
+    export.add_argument("path")
+    export.set_defaults(func=cmd_contacts_export)
+    changes = actions.add_parser("changes", help="print contact changes after a sequence number as JSON lines")
+    changes.add_argument("--since", type=int, default=0,
+                         help="last sequence number already synced (default: 0, everything)")
+    changes.set_defaults(func=cmd_contacts_changes)
+
+    logs = commands.add_parser("logs", help="print log records as JSON lines")
+    logs.add_argument("--since", type=_date, default=date.today() - timedelta(days=1),
+                      help="first date, YYYY-MM-DD (default: yesterday)")
+    logs.add_argument("--until", type=_date, default=date.today(), help="last date, YYYY-MM-DD (default: today)")
+    logs.set_defaults(func=cmd_logs)
+
+    return parser
+
+
+def main(argv: list[str] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        from morning_greetings.main import main as interactive_main
+        interactive_main()
+        return EXIT_OK
+
+    args = build_parser().parse_args(argv)
+    if args.command is None:
+        build_parser().print_usage(sys.stderr)
+        return EXIT_USAGE
+
+    # Progress messages go to stderr so stdout only has the machine-readable output
+    import contextlib
+    args.out = sys.stdout
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            if args.profile:
+                from morning_greetings.profiling import run_profiled
+                summary, code = run_profiled(args.func, args.profile, args)
+            else:
+                summary, code = args.func(args)
+    except Exception as e:
+        summary, code = {"error": str(e)}, EXIT_ERROR
+
+    if args.metrics:
+        from morning_greetings.metrics import get_metrics
+        try:
+            get_metrics().write(args.metrics)
+        except OSError as e:
+            summary, code = {**summary, "error": f"could not write metrics: {e}"}, EXIT_ERROR
+
+    command = args.command if args.command != "contacts" else f"contacts {args.action}"
+    summary = {"command": command, "exit_code": code, **summary}
+    print(json.dumps(summary))
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+# contact_batch.py
+
+from datetime import date, datetime
+from morning_greetings.contacts import Contact, ContactList, get_zone, minutes_to_time
+from morning_greetings.sent_index import SentIndex
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, see the "fast" extra in setup.py
+    np = None
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def _seconds_of_day(t: datetime) -> float:
+    return t.hour * 3600 + t.minute * 60 + t.second + t.microsecond / 1e6
+
+
+class ContactBatch:
+    def __init__(self, names, emails, minutes, timezones=None) -> None:
+        """Initiates the ContactBatch with columns of names, emails, preferred minutes since midnight
+        and optionally IANA timezones ("" or None for the server's local time, the default).
+
+        Timezones are stored as a small int column of positions in self.zones, since a list has
+        only a handful of distinct zones."""
+        if np is None:
+            raise ImportError("ContactBatch needs NumPy. Install it with: pip install .[fast]")
+        self.names = np.asarray(names, dtype=object)
+        self.emails = np.asarray(emails, dtype=object)
+        self.minutes = np.asarray(minutes, dtype=np.int16)
+        if timezones is None:
+            self.zones = [""]
+            self.zone_ids = np.zeros(len(self.emails), dtype=np.int16)
+        else:
+            ids = {}
+            self.zone_ids = np.fromiter((ids.setdefault(tz or "", len(ids)) for tz in timezones),
+                                        dtype=np.int16, count=len(timezones))
+            self.zones = list(ids)
+        if not (len(self.names) == len(self.emails) == len(self.minutes) == len(self.zone_ids)):
+            raise ValueError("Columns must have the same length.")
+
+    @classmethod
+    def from_contact_list(cls, contact_list: ContactList) -> "ContactBatch":
+        """Creates a ContactBatch with the contacts of a ContactList, in the same order."""
+        contacts = contact_list.get_contacts()
+        n = len(contacts)
+        return cls(
+            np.fromiter((c.name for c in contacts), dtype=object, count=n),
+            np.fromiter((c.email for c in contacts), dtype=object, count=n),
+            np.fromiter((c.preferred_minutes for c in contacts), dtype=np.int16, count=n),
+            [c.timezone for c in contacts],
+        )
+
+    @property
+    def timezones(self):
+        """The timezone of each contact as an object array, "" for the server's local time."""
+        return np.asarray(self.zones, dtype=object)[self.zone_ids]
+
+    def _rows(self):
+        return zip(self.names, self.emails, self.minutes.tolist(), self.timezones)
+
+    def to_contact_list(self) -> ContactList:
+        """Creates a ContactList with the contacts in the batch, validating each one."""
+        contact_list = ContactList()
+        for name, email, minutes, timezone in self._rows():
+            contact_list.add_contact(name, email, minutes_to_time(minutes), timezone or None)
+        return contact_list
+
+    def contacts(self) -> list[Contact]:
+        """Returns the batch as a list of Contact objects."""
+        return [Contact(name, email, minutes_to_time(minutes), timezone or None)
+                for name, email, minutes, timezone in self._rows()]
+
+    def window_mask(self, now: datetime = None, window_minutes: int = 15):
+        """Returns a boolean array marking the contacts whose preferred time, on their own
+        timezone's clock, is within window_minutes of now. The window wraps around midnight,
+        so at 11:55 PM a contact at 12:05 AM is included.
+
+        This matches SendScheduler.due() except in the hour a DST change skips or repeats, where
+        only the wall-clock times are compared."""
+        ahead = self._ahead(now or datetime.now())
+        window = window_minutes * 60
+        return (ahead <= window) | (ahead >= MINUTES_PER_DAY * 60 - window)
+
+    def _ahead(self, now: datetime):
+        # The time of day now in each zone, then picked out for every row by its zone
+        timestamp = now.timestamp()
+        seconds = np.array([_seconds_of_day(datetime.fromtimestamp(timestamp, get_zone(zone) if zone else None))
+                            for zone in self.zones])[self.zone_ids]
+        # Distance from now to the preferred time going forward, in seconds, wrapped to one day
+        return (self.minutes.astype(np.int32) * 60 - seconds) % (MINUTES_PER_DAY * 60)
+
+    def window_opened(self, now: datetime = None, window_minutes: int = 15):
+        """Returns the timestamp at which each contact's window nearest to now opens (or opened),
+        window_minutes before its preferred time."""
+        now = now or datetime.now()
+        ahead = self._ahead(now)
+        # Preferred times more than half a day ahead are the ones that already passed
+        day = MINUTES_PER_DAY * 60
+        return now.timestamp() + ahead - np.where(ahead > day / 2, day, 0) - window_minutes * 60
+
+    def not_sent_mask(self, sent_index: SentIndex, day: date = None):
+        """Returns a boolean array marking the contacts not messaged on day (today by default).
+
+        This is not vectorized: each email is looked up in the sent set one row at a time. np.isin
+        was slower (0.9 s against 0.2 s for a million emails, counting the conversion to a string
+        array) and is quadratic on object arrays, so due() only runs this on the rows in the window."""
+        sent = sent_index.emails_on(day)
+        if not sent:
+            return np.ones(len(self), dtype=bool)
+        return ~np.fromiter(map(sent.__contains__, self.emails), dtype=bool, count=len(self))
+
+    def not_sent_since_mask(self, sent_index: SentIndex, since):
+        """Returns a boolean array marking the contacts not messaged since the timestamps in since,
+        one per row. Like not_sent_mask, this looks up one row at a time."""
+        return ~np.fromiter(map(sent_index.sent_since, self.emails, since.tolist()), dtype=bool, count=len(self))
+
+    def due(self, sent_index: SentIndex, now: datetime = None) -> "ContactBatch":
+        """Returns the contacts in the window around now that have not been messaged since their
+        window opened, as SendScheduler.due() does, so a window that crosses midnight isn't sent twice."""
+        now = now or datetime.now()
+        # The window mask is cheap, so the email lookups only run for the few contacts inside it
+        in_window = self[self.window_mask(now)]
+        return in_window[in_window.not_sent_since_mask(sent_index, in_window.window_opened(now))]
+
+    def __getitem__(self, selection) -> "ContactBatch":
+        """Returns the rows picked by a boolean mask, index array or slice as a new ContactBatch."""
+        batch = ContactBatch(self.names[selection], self.emails[selection], self.minutes[selection])
+        batch.zones, batch.zone_ids = self.zones, self.zone_ids[selection]
+        return batch
+
+    def __len__(self) -> int:
+        return len(self.emails)
+
+    def __repr__(self) -> str:
+        """Represent the batch with its length for readability."""
+        return f"ContactBatch({len(self)} contacts)"
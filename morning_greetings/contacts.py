@@ -1,14 +1,75 @@
 # contacts.py
 
 import re
-from datetime import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+# Compiled once instead of on every validation
+EMAIL_REGEX = re.compile(r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)")
+# Accepts the same times as datetime.strptime(time_str, "%I:%M %p")
+TIME_REGEX = re.compile(r"(1[0-2]|0[1-9]|[1-9]):([0-5][0-9]|[0-9])\s+([AaPp][Mm])")
+
+def time_to_minutes(time_str: str) -> int:
+    """Converts a HH:MM AM/PM time string to minutes since midnight."""
+    match = TIME_REGEX.fullmatch(time_str) if isinstance(time_str, str) else None
+    if match is None:
+        raise ValueError(f"Invalid time format: {time_str}. Expected HH:MM AM/PM (12-hour).")
+    hour = int(match.group(1)) % 12
+    if match.group(3) in ("PM", "pm", "Pm", "pM"):
+        hour += 12
+    return hour * 60 + int(match.group(2))
+
+def minutes_to_time(minutes: int) -> str:
+    """Converts minutes since midnight to a HH:MM AM/PM time string."""
+    hour, minute = divmod(minutes, 60)
+    return f"{(hour - 1) % 12 + 1:02d}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+def time_band(minutes: int) -> str:
+    """Returns the part of the day ("morning", "afternoon" or "evening") for minutes since midnight."""
+    hour = minutes // 60
+    if 5 <= hour < 12:  # Morning (5 AM - 12 PM)
+        return "morning"
+    elif 12 <= hour < 18:  # Afternoon (12 PM - 6 PM)
+        return "afternoon"
+    else:  # Evening (6 PM - 5 AM)
+        return "evening"
+
+@lru_cache(maxsize=None)
+def get_zone(timezone: str) -> ZoneInfo:
+    """Returns the ZoneInfo for an IANA timezone name such as "Europe/Oslo"."""
+    try:
+        return ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError, TypeError):
+        raise ValueError(f"Invalid timezone: {timezone}. Expected an IANA name such as Europe/Oslo.") from None
 
 class Contact:
-    def __init__(self, name: str, email: str, preferred_time: str = "08:00 AM"):
-        """Initiates the Contact class with name, email, and preferred_time."""
+    # No per-instance __dict__, which matters for lists with millions of contacts
+    __slots__ = ("name", "email", "preferred_minutes", "time_band", "timezone")
+
+    def __init__(self, name: str, email: str, preferred_time: str = "08:00 AM", timezone: str = None):
+        """Initiates the Contact class with name, email, preferred_time and an optional IANA timezone.
+
+        Without a timezone the preferred time is in the server's local time."""
         self.name = self.validate_name(name)
         self.email = self.validate_email(email)
-        self.preferred_time = self.validate_time(preferred_time)
+        self.preferred_time = preferred_time
+        self.timezone = self.validate_timezone(timezone)
+
+    @property
+    def zone(self) -> ZoneInfo:
+        """The contact's ZoneInfo, or None for the server's local time."""
+        return get_zone(self.timezone) if self.timezone else None
+
+    @property
+    def preferred_time(self) -> str:
+        """The preferred time as HH:MM AM/PM, formatted from preferred_minutes when asked for."""
+        return minutes_to_time(self.preferred_minutes)
+
+    @preferred_time.setter
+    def preferred_time(self, time_str: str) -> None:
+        self.preferred_minutes = time_to_minutes(time_str)
+        # Worked out once here so message generation doesn't have to parse the time again
+        self.time_band = time_band(self.preferred_minutes)
 
     def validate_name(self, name: str) -> str:
         """Validates that name is a non-empty string."""
@@ -18,54 +79,120 @@ class Contact:
 
     def validate_email(self, email: str) -> str:
         """Validates that email follows the correct format."""
-        # Basic regex for validating email format
-        email_regex = r"(^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$)"
-        if not re.match(email_regex, email):
+        if not EMAIL_REGEX.match(email):
             raise ValueError(f"Invalid email address: {email}")
         return email
 
     def validate_time(self, time_str: str) -> str:
         """Validates that preferred_time format as HH:MM AM/PM."""
-        try:
-            # Use datetime to check if the time is in the correct format
-            valid_time = datetime.strptime(time_str, "%I:%M %p")
-            return time_str
-        except ValueError:
-            raise ValueError(f"Invalid time format: {time_str}. Expected HH:MM AM/PM (12-hour).")
+        time_to_minutes(time_str)
+        return time_str
+
+    def validate_timezone(self, timezone: str) -> str:
+        """Validates that timezone is a known IANA timezone name, or empty for local time."""
+        if not timezone:
+            return None
+        get_zone(timezone)
+        return timezone
     
     def __repr__(self):
         """Represent the contact with name and email for readability."""
-        return f"Contact(name='{self.name}', email='{self.email}', preferred_time='{self.preferred_time}')"
+        timezone = f", timezone='{self.timezone}'" if self.timezone else ""
+        return f"Contact(name='{self.name}', email='{self.email}', preferred_time='{self.preferred_time}'{timezone})"
 
 class ContactList:
-    def __init__(self) -> None:
-        """Initiates the ContactList class."""
-        self.contacts = []
-    
-    def add_contact(self, name: str, email: str, preferred_time: str = "08:00 AM") -> None:
-        """Creates and appends a new contact with name, email, and preferred_time."""
-        if any(c.email == email for c in self.contacts):
+    def __init__(self, store=None) -> None:
+        """Initiates the ContactList class, loading contacts from store and saving changes to it if given."""
+        # Contacts keyed by email (dicts keep insertion order), and by lower-cased name
+        self._by_email = {}
+        self._by_name = {}
+        self._listeners = []
+
+        self.store = store
+        if store is not None:
+            for name, email, preferred_time, timezone in store.load():
+                contact = Contact(name=name, email=email, preferred_time=preferred_time, timezone=timezone)
+                self._by_email[contact.email] = contact
+                self._index_name(contact)
+            self.subscribe(store.on_change)
+
+    def subscribe(self, listener) -> None:
+        """Registers listener(event, contact, old_email) to be called after every add, update and remove."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener) -> None:
+        """Stops calling a listener registered with subscribe."""
+        self._listeners.remove(listener)
+
+    def _notify(self, event: str, contact: Contact, old_email: str) -> None:
+        for listener in self._listeners:
+            listener(event, contact, old_email)
+
+    @property
+    def contacts(self) -> list[Contact]:
+        """All contacts in the order they were added."""
+        return list(self._by_email.values())
+
+    def _index_name(self, c: Contact) -> None:
+        self._by_name.setdefault(c.name.lower(), {})[c.email] = c
+
+    def _unindex_name(self, c: Contact) -> None:
+        key = c.name.lower()
+        bucket = self._by_name.get(key)
+        if bucket is not None:
+            bucket.pop(c.email, None)
+            if not bucket:
+                del self._by_name[key]
+
+    def add_contact(self, name: str, email: str, preferred_time: str = "08:00 AM", timezone: str = None) -> None:
+        """Creates and appends a new contact with name, email, preferred_time and timezone."""
+        if email in self._by_email:
             raise ValueError(f"Contact with email ({email}) already exists.")
         
-        contact = Contact(name=name, email=email, preferred_time=preferred_time)
-        self.contacts.append(contact)
+        contact = Contact(name=name, email=email, preferred_time=preferred_time, timezone=timezone)
+        self._by_email[contact.email] = contact
+        self._index_name(contact)
+        self._notify("add", contact, contact.email)
     
     def remove_contact(self, email: str = None, name: str = None) -> bool:
         """Removes a contact by email or name and returns True if a contact was removed, False otherwise."""
-        initial_length = len(self.get_contacts())
         if email:
-            self.contacts = [c for c in self.get_contacts() if c.email != email]
+            removed = [self._by_email[email]] if email in self._by_email else []
         elif name:
-            self.contacts = [c for c in self.get_contacts() if c.name != name]
-        return len(self.contacts) < initial_length
+            removed = [c for c in self._by_name.get(name.lower(), {}).values() if c.name == name]
+        else:
+            removed = []
 
-    def update_contact(self, email: str, name: str = None, preferred_time: str = None) -> bool:
-        """Update an existing contact's name or preferred time."""
+        for c in removed:
+            del self._by_email[c.email]
+            self._unindex_name(c)
+            self._notify("remove", c, c.email)
+        return len(removed) > 0
+
+    def update_contact(self, email: str, name: str = None, preferred_time: str = None, new_email: str = None,
+                       timezone: str = None) -> bool:
+        """Update an existing contact's name, preferred time, email or timezone ("" resets it to local time)."""
         c = self.find_contact_by_email(email)
-        if name:
-            c.name = c.validate_email(name)
-        if preferred_time:
-            c.preferred_time = c.validate_time(preferred_time)
+        # Validate everything before changing anything, so a bad value leaves the contact untouched
+        name = c.validate_name(name) if name else c.name
+        preferred_time = c.validate_time(preferred_time) if preferred_time else c.preferred_time
+        new_email = c.validate_email(new_email) if new_email else c.email
+        timezone = c.validate_timezone(timezone) if timezone is not None else c.timezone
+        if new_email != c.email and new_email in self._by_email:
+            raise ValueError(f"Contact with email ({new_email}) already exists.")
+
+        old_email = c.email
+        self._unindex_name(c)
+        if new_email != c.email:
+            # Re-insert under the new key; the contact moves to the end of the order
+            del self._by_email[c.email]
+            c.email = new_email
+            self._by_email[new_email] = c
+        c.name = name
+        c.preferred_time = preferred_time
+        c.timezone = timezone
+        self._index_name(c)
+        self._notify("update", c, old_email)
         return True
 
     def get_contacts(self) -> list[Contact]:
@@ -74,24 +201,30 @@ class ContactList:
     
     def find_contact_by_email(self, email: str) -> Contact:
         """Find a contact by email."""
-        for c in self.get_contacts():
-            if c.email == email:
-                return c
-        raise ValueError(f"Contact with email ({email}) not found.")
+        try:
+            return self._by_email[email]
+        except KeyError:
+            raise ValueError(f"Contact with email ({email}) not found.") from None
     
-    def find_contact_by_name(self, name: str) -> list[Contact]:
-        """Find all contacts with name."""
-        contacts = []
-
-        for c in self.get_contacts():
-            if c.name == name:
-                contacts.append(c)
+    def find_contact_by_name(self, name: str, ignore_case: bool = False) -> list[Contact]:
+        """Find all contacts with name, optionally ignoring case."""
+        bucket = self._by_name.get(name.lower(), {})
+        if ignore_case:
+            contacts = list(bucket.values())
+        else:
+            contacts = [c for c in bucket.values() if c.name == name]
         
         if len(contacts) == 0:
             raise ValueError(f"Contact with name ({name}) not found.")
         
         return contacts
 
+    def __len__(self) -> int:
+        return len(self._by_email)
+
+    def __contains__(self, email: str) -> bool:
+        return email in self._by_email
+
     def __repr__(self) -> str:
         """Represent the contact list with length and names for readability."""
-        return f"ContactList({len(self.contacts)} contacts: {', '.join([c.name for c in self.contacts])})"
\ No newline at end of file
+        return f"ContactList({len(self._by_email)} contacts: {', '.join([c.name for c in self._by_email.values()])})"
\ No newline at end of file
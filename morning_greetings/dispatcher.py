@@ -0,0 +1,92 @@
+# dispatcher.py
+
+import time
+from morning_greetings.contacts import Contact
+from morning_greetings.message_sender import deliver_message, record_message
+from morning_greetings.metrics import get_metrics
+from morning_greetings.transport import Transport
+
+
+class DispatchSummary:
+    def __init__(self, sent: int, failed: list, elapsed: float, latencies: list[float]) -> None:
+        """Initiates the DispatchSummary with the results of a dispatch run."""
+        self.sent = sent
+        self.failed = failed  # list of (Contact, Exception)
+        self.elapsed = elapsed
+        self.latencies = sorted(latencies)
+
+    def percentile(self, p: float) -> float:
+        """Returns the p-th percentile send latency in seconds (nearest rank)."""
+        if not self.latencies:
+            return 0.0
+        idx = max(int(round(p / 100 * len(self.latencies) + 0.5)) - 1, 0)
+        return self.latencies[min(idx, len(self.latencies) - 1)]
+
+    @property
+    def rate(self) -> float:
+        """Messages sent per second."""
+        return self.sent / self.elapsed if self.elapsed > 0 else 0.0
+
+    def as_dict(self) -> dict:
+        """Returns the summary as a JSON-friendly dict."""
+        return {
+            "sent": self.sent,
+            "failed": len(self.failed),
+            "failed_emails": [c.email for c, _ in self.failed],
+            "elapsed_s": round(self.elapsed, 3),
+            "msgs_per_sec": round(self.rate, 1),
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+        }
+
+    def __repr__(self) -> str:
+        """Represent the summary as a one-line throughput report."""
+        return (f"Sent {self.sent} message(s), {len(self.failed)} failed in {self.elapsed:.2f}s "
+                f"({self.rate:.1f} msgs/sec, p50 {self.percentile(50) * 1000:.1f} ms, "
+                f"p99 {self.percentile(99) * 1000:.1f} ms)")
+
+
+def dispatch(jobs: list[tuple[Contact, str]], transport: Transport, concurrency: int = 8,
+             retries: int = 3, backoff: float = 0.5) -> DispatchSummary:
+    """Sends each (contact, message) job on a pool of worker threads, retrying temporary failures."""
+    metrics = get_metrics()
+
+    def deliver(job):
+        c, msg = job
+        start = time.perf_counter()
+        # Only the delivery is retried; a failed log write must not send the message again
+        for attempt in range(retries + 1):
+            try:
+                deliver_message(c, msg, transport)
+                break
+            except Exception as e:
+                if attempt == retries or not transport.is_transient(e):
+                    return c, time.perf_counter() - start, e
+                metrics.inc("send_retries_total")
+                # Exponential backoff: 0.5s, 1s, 2s, ...
+                time.sleep(backoff * 2 ** attempt)
+        latency = time.perf_counter() - start
+        try:
+            record_message(c, msg)
+        except Exception as e:
+            # The message went out, so it counts as sent
+            print(f"Sent message to {c.email} but could not log it: {e}")
+            metrics.inc("log_errors_total")
+        return c, latency, None
+
+    # Imported here to keep start-up fast for runs that have nothing to send
+    from concurrent.futures import ThreadPoolExecutor
+
+    latencies, failed = [], []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+        for c, latency, error in pool.map(deliver, jobs):
+            if error is None:
+                latencies.append(latency)
+            else:
+                print(f"Failed to send message to {c.email}: {error}")
+                failed.append((c, error))
+
+    metrics.inc("messages_sent_total", len(latencies))
+    metrics.inc("messages_failed_total", len(failed))
+    return DispatchSummary(len(latencies), failed, time.perf_counter() - start, latencies)
@@ -0,0 +1,191 @@
+# journal.py
+
+import json
+import os
+from collections import namedtuple
+from morning_greetings.contacts import Contact, ContactList
+
+JOURNAL_FILE = "contacts.changes"
+SNAPSHOT_SUFFIX = ".snapshot"
+
+# One change to a ContactList. op is "add", "update" or "remove"; old_email is the email before an
+# update (the key to find the contact by) and the fields are the contact's values after the change.
+Change = namedtuple("Change", ["seq", "op", "email", "old_email", "name", "preferred_time", "timezone"])
+
+
+def journal_path(db_path: str) -> str:
+    """Returns the journal file that belongs with a contacts database, e.g. contacts.changes for contacts.db."""
+    return os.path.splitext(db_path)[0] + ".changes"
+
+
+class ChangeJournal:
+    def __init__(self, path: str = None, max_entries: int = 10000) -> None:
+        """Initiates the ChangeJournal, an append-only record of every add, update and remove on a
+        ContactList, each with a sequence number one higher than the last.
+
+        A consumer that has seen everything up to some seq asks for changes_since(seq) and gets only
+        what changed after it. Once max_entries changes have piled up, the journal is compacted into
+        a snapshot of the contacts; consumers older than the snapshot start over from it.
+
+        With a path, changes are appended to the file as JSON lines and the snapshot is kept next to
+        it, so sequence numbers carry over between runs."""
+        self.path = path
+        self.max_entries = max_entries
+        self.snapshot_seq = 0
+        self.snapshot_rows = []
+        self.entries = []  # Changes after snapshot_seq, in order
+        self._count = 0    # Contacts after the last change, to notice edits made without the journal
+        self._contacts = None
+        self._file = None
+        self._truncated = False  # Set by _load if it cut off a damaged end of the journal
+        if path is not None:
+            self._load()
+
+    def _load(self) -> None:
+        try:
+            with open(self.path + SNAPSHOT_SUFFIX, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.snapshot_seq = data["seq"]
+            self.snapshot_rows = [tuple(row) for row in data["contacts"]]
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            self.snapshot_seq, self.snapshot_rows = 0, []
+        self._count = len(self.snapshot_rows)
+
+        # Bytes up to the end of the last complete change
+        end = 0
+        try:
+            with open(self.path, "rb") as f:
+                for line in f:
+                    # The journal ends at a partially written last line, or at one that doesn't parse
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        change = Change(**json.loads(line))
+                    except (ValueError, TypeError):
+                        break
+                    end += len(line)
+                    # Entries up to the snapshot are left over from a compaction that was interrupted
+                    if change.seq > self.snapshot_seq:
+                        self._append(change)
+            # Cut off the rest, so new changes aren't appended onto a broken line
+            if os.path.getsize(self.path) > end:
+                os.truncate(self.path, end)
+                self._truncated = True
+        except FileNotFoundError:
+            pass
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    @property
+    def last_seq(self) -> int:
+        """The sequence number of the latest change, or of the snapshot if nothing changed after it."""
+        return self.entries[-1].seq if self.entries else self.snapshot_seq
+
+    def attach(self, contact_list: ContactList, resnapshot: bool = False) -> None:
+        """Starts recording the changes made to contact_list.
+
+        If the contacts don't match what the journal has recorded (a new journal for a list that
+        already has contacts, or contacts imported straight into the store), a snapshot is taken
+        first so replaying the journal gives the current contacts. resnapshot takes one regardless,
+        for changes the count doesn't show, and so does a journal whose damaged end was cut off."""
+        self._contacts = contact_list
+        if resnapshot or self._truncated or len(contact_list) != self._count:
+            self.compact(advance=True)
+            self._truncated = False
+        contact_list.subscribe(self.on_change)
+
+    def _append(self, change: Change) -> None:
+        self.entries.append(change)
+        if change.op == "add":
+            self._count += 1
+        elif change.op == "remove":
+            self._count -= 1
+
+    def on_change(self, event: str, c: Contact, old_email: str) -> None:
+        """ContactList listener that appends the change to the journal."""
+        change = Change(self.last_seq + 1, event, c.email, old_email, c.name, c.preferred_time, c.timezone)
+        self._append(change)
+        if self._file is not None:
+            self._file.write(json.dumps(change._asdict(), ensure_ascii=False) + "\n")
+            self._file.flush()
+        if len(self.entries) >= self.max_entries and self._contacts is not None:
+            self.compact()
+
+    def changes_since(self, seq: int) -> list[Change]:
+        """Returns the changes after seq, oldest first.
+
+        Raises ValueError if seq is older than the snapshot, since those changes are gone; the caller
+        has to start over from snapshot() instead."""
+        if seq < self.snapshot_seq:
+            raise ValueError(f"Changes before {self.snapshot_seq} have been compacted. Start over from the snapshot.")
+        if seq > self.last_seq:
+            raise ValueError(f"Sequence {seq} is newer than the journal ({self.last_seq}).")
+        # Sequence numbers have no gaps, so the position in entries follows from seq
+        return self.entries[seq - self.snapshot_seq:]
+
+    def snapshot(self) -> tuple[int, list[tuple]]:
+        """Returns (seq, rows) for the latest snapshot, with rows as (name, email, preferred_time, timezone)."""
+        return self.snapshot_seq, self.snapshot_rows
+
+    def delta(self, seq: int) -> tuple[list[tuple], list[Change], int]:
+        """Returns (rows, changes, last_seq) to bring a consumer at seq up to date. rows is the snapshot
+        to start over from when seq is older than it (or None), and changes follow the snapshot or seq."""
+        if seq < self.snapshot_seq:
+            return self.snapshot_rows, self.entries, self.last_seq
+        return None, self.changes_since(seq), self.last_seq
+
+    def compact(self, advance: bool = False) -> None:
+        """Replaces the recorded changes with a snapshot of the attached contact list.
+
+        With advance, the snapshot gets a sequence number of its own, so every consumer starts over
+        from it. That is needed when the contacts were changed without going through the journal."""
+        if self._contacts is None:
+            raise ValueError("The journal has no contact list to snapshot. Call attach() first.")
+        self.snapshot_seq = self.last_seq + 1 if advance else self.last_seq
+        self.snapshot_rows = [(c.name, c.email, c.preferred_time, c.timezone) for c in self._contacts.get_contacts()]
+        self.entries = []
+        self._count = len(self.snapshot_rows)
+        if self.path is None:
+            return
+
+        # The snapshot is written before the journal is emptied, so a crash in between only leaves
+        # entries that _load skips
+        tmp_path = f"{self.path}{SNAPSHOT_SUFFIX}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"seq": self.snapshot_seq, "contacts": self.snapshot_rows}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path + SNAPSHOT_SUFFIX)
+        self._file.close()
+        self._file = open(self.path, "w", encoding="utf-8")
+
+    def close(self) -> None:
+        """Closes the journal file."""
+        if self._file is not None:
+            self._file.close()
+
+
+def apply_changes(contact_list: ContactList, changes: list[Change]) -> int:
+    """Replays changes on contact_list, e.g. a copy on another node, and returns the number applied.
+
+    Changes that are already reflected (an add for an email that exists, a remove for one that
+    doesn't) are applied as the closest equivalent, so replaying the same changes twice is harmless."""
+    for change in changes:
+        if change.op == "remove":
+            contact_list.remove_contact(email=change.email)
+        elif change.op == "update" and change.old_email in contact_list:
+            contact_list.update_contact(change.old_email, name=change.name, preferred_time=change.preferred_time,
+                                        new_email=change.email, timezone=change.timezone or "")
+        elif change.email in contact_list:
+            contact_list.update_contact(change.email, name=change.name, preferred_time=change.preferred_time,
+                                        timezone=change.timezone or "")
+        else:
+            contact_list.add_contact(change.name, change.email, change.preferred_time, change.timezone)
+    return len(changes)
+
+
+def apply_snapshot(contact_list: ContactList, rows: list[tuple]) -> None:
+    """Makes contact_list hold exactly the contacts in a snapshot's rows."""
+    emails = {row[1] for row in rows}
+    for c in contact_list.get_contacts():
+        if c.email not in emails:
+            contact_list.remove_contact(email=c.email)
+    apply_changes(contact_list, [Change(0, "add", email, email, name, preferred_time, timezone)
+                                 for name, email, preferred_time, timezone in rows])
@@ -0,0 +1,116 @@
+# ledger.py
+
+import sqlite3
+import time
+from datetime import date, timedelta
+
+LEDGER_FILE = "ledger.db"
+# Claims for scheduled sends are dated on the contact's own clock, which can be up to two days
+# behind the server's (UTC-12 against UTC+14), so that far back is kept
+KEEP_DAYS = 3
+
+
+def by_day(emails: list[str], days: dict[str, str], default: str) -> dict[str, list[str]]:
+    """Groups emails by their day in days (default for those not in it), for the calls below that take one day."""
+    groups = {}
+    for email in emails:
+        groups.setdefault(days.get(email, default), []).append(email)
+    return groups
+
+
+class SendLedger:
+    def __init__(self, path: str = LEDGER_FILE, timeout: float = 30) -> None:
+        """Initiates the SendLedger, a SQLite database shared by all processes of a send run.
+
+        A message is claimed in the ledger before it is sent, and a claim only succeeds once per
+        email per day, so parallel workers and restarted runs never send the same message twice."""
+        self.path = path
+        # Autocommit mode, transactions are started explicitly with BEGIN IMMEDIATE
+        self.conn = sqlite3.connect(path, timeout=timeout, isolation_level=None)
+        # WAL lets readers and the single writer work at the same time across processes
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS sends ("
+            "day TEXT NOT NULL, email TEXT NOT NULL, status TEXT NOT NULL, "
+            "worker INTEGER, updated REAL NOT NULL, PRIMARY KEY (day, email))"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS shards ("
+            "day TEXT NOT NULL, shards INTEGER NOT NULL, shard INTEGER NOT NULL, "
+            "fingerprint INTEGER NOT NULL, updated REAL NOT NULL, PRIMARY KEY (day, shards, shard))"
+        )
+        self.prune()
+
+    def prune(self) -> None:
+        """Drops the claims and completed shards of days older than KEEP_DAYS, so the ledger stays
+        the size of a few days of sends."""
+        oldest = (date.today() - timedelta(days=KEEP_DAYS - 1)).isoformat()
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.execute("DELETE FROM sends WHERE day < ?", (oldest,))
+        self.conn.execute("DELETE FROM shards WHERE day < ?", (oldest,))
+        self.conn.execute("COMMIT")
+
+    def claim_many(self, day: str, emails: list[str], worker: int = None) -> set[str]:
+        """Claims the emails for day in one transaction and returns the ones this call got.
+
+        Emails that are already claimed or sent, by any process, are left out."""
+        claimed = set()
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for email in emails:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO sends (day, email, status, worker, updated) VALUES (?, ?, 'claimed', ?, ?)",
+                    (day, email, worker, now),
+                )
+                if cursor.rowcount == 1:
+                    claimed.add(email)
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return claimed
+
+    def mark_sent(self, day: str, emails: list[str]) -> None:
+        """Marks claimed emails as sent."""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany(
+            "UPDATE sends SET status = 'sent', updated = ? WHERE day = ? AND email = ?",
+            [(now, day, email) for email in emails],
+        )
+        self.conn.execute("COMMIT")
+
+    def release(self, day: str, emails: list[str]) -> None:
+        """Drops the claims for emails that failed to send, so a later run can try them again."""
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany(
+            "DELETE FROM sends WHERE day = ? AND email = ? AND status = 'claimed'",
+            [(day, email) for email in emails],
+        )
+        self.conn.execute("COMMIT")
+
+    def in_doubt(self, day: str) -> list[str]:
+        """Returns emails that were claimed but never confirmed as sent or failed, e.g. after a crash.
+
+        These may or may not have been delivered, so they are reported rather than sent again."""
+        rows = self.conn.execute("SELECT email FROM sends WHERE day = ? AND status = 'claimed'", (day,))
+        return [email for email, in rows]
+
+    def mark_shard_done(self, day: str, shards: int, shard: int, fingerprint: int) -> None:
+        """Records that every contact in a shard has been handled. fingerprint identifies the
+        shard's contacts, so the shard counts as done only while they stay the same."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO shards (day, shards, shard, fingerprint, updated) VALUES (?, ?, ?, ?, ?)",
+            (day, shards, shard, fingerprint, time.time()),
+        )
+
+    def completed_shards(self, day: str, shards: int) -> dict[int, int]:
+        """Returns {shard: fingerprint} for the shards (out of shards) completed on day."""
+        rows = self.conn.execute("SELECT shard, fingerprint FROM shards WHERE day = ? AND shards = ?", (day, shards))
+        return dict(rows.fetchall())
+
+    def close(self) -> None:
+        """Closes the database."""
+        self.conn.close()
@@ -0,0 +1,57 @@
+# log_records.py
+
+import json
+from collections import namedtuple
+from datetime import datetime
+
+# One sent message in the log. email is None for old lines that didn't record it.
+LogRecord = namedtuple("LogRecord", ["time", "name", "email", "msg"])
+
+
+def to_json(record: LogRecord) -> str:
+    """Returns the record as one JSON line (without the newline)."""
+    return json.dumps({
+        "ts": record.time.isoformat(),
+        "epoch": record.time.timestamp(),
+        "name": record.name,
+        "email": record.email,
+        "msg": record.msg,
+    }, ensure_ascii=False)
+
+
+def _parse_legacy(line: str) -> LogRecord:
+    # Old format: "YYYY-MM-DD HH:MM:SS.ffffff - Sent to Name (email): message"
+    time_str, sep, details = line.partition(" - Sent to ")
+    if not sep:
+        return None
+    header, _, msg = details.partition(": ")
+    try:
+        time = datetime.fromisoformat(time_str.strip())
+    except ValueError:
+        return None
+
+    # The oldest lines have no "(email)" part
+    start_email_idx = header.rfind("(")
+    end_email_idx = header.rfind(")")
+    if start_email_idx == -1 or end_email_idx < start_email_idx:
+        return LogRecord(time, header.strip(), None, msg)
+    return LogRecord(time, header[:start_email_idx].strip(), header[start_email_idx + 1:end_email_idx], msg)
+
+
+def parse_log_line(line: str) -> LogRecord:
+    """Parses a JSON or old-style text log line, returning None if it is neither."""
+    line = line.rstrip("\n")
+    if not line.startswith("{"):
+        return _parse_legacy(line)
+    try:
+        data = json.loads(line)
+        return LogRecord(datetime.fromisoformat(data["ts"]), data["name"], data["email"], data["msg"])
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def format_record(record: LogRecord) -> str:
+    """Formats the record the way log lines used to look, for printing."""
+    if record.email is None:
+        return f"{record.time} - Sent to {record.name}: {record.msg}"
+    return f"{record.time} - Sent to {record.name} ({record.email}): {record.msg}"
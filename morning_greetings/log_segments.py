@@ -0,0 +1,158 @@
+# log_segments.py
+
+import glob
+import gzip
+import json
+import os
+import shutil
+from bisect import bisect_left
+from datetime import date
+from morning_greetings.log_records import parse_log_line
+
+INDEX_SUFFIX = ".idx"
+
+
+class SegmentIndex:
+    def __init__(self, path: str) -> None:
+        """Initiates the SegmentIndex, which maps each date in the log segment at path to the byte offset of its first line."""
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self.size = 0        # bytes of the segment that have been indexed
+        self.inode = None
+        self.dates = {}      # "YYYY-MM-DD" -> offset of the first line with that date
+        self.load()
+
+    def load(self) -> None:
+        """Loads the saved index, if there is one."""
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+            self.size, self.inode, self.dates = data["size"], data["inode"], data["dates"]
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            self.size, self.inode, self.dates = 0, None, {}
+
+    def save(self) -> None:
+        """Writes the index next to the segment."""
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"size": self.size, "inode": self.inode, "dates": self.dates}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def refresh(self) -> None:
+        """Indexes the lines added to the segment since the last refresh."""
+        compressed = self.path.endswith(".gz")
+        if compressed:
+            # Compressed segments never change, so an existing index is complete
+            if self.dates or not os.path.exists(self.path):
+                return
+            opener = gzip.open
+        else:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return
+            # The segment was replaced or truncated, so index the new file from the start
+            if stat.st_ino != self.inode or stat.st_size < self.size:
+                self.size, self.inode, self.dates = 0, stat.st_ino, {}
+            if stat.st_size == self.size:
+                return
+            opener = open
+
+        with opener(self.path, "rb") as f:
+            f.seek(self.size)
+            for line in f:
+                # Stop at a partially written last line, it is indexed on the next refresh
+                if not line.endswith(b"\n"):
+                    break
+                record = parse_log_line(line.decode("utf-8", errors="replace"))
+                if record is not None:
+                    self.dates.setdefault(record.time.date().isoformat(), self.size)
+                self.size += len(line)
+        self.save()
+
+    @property
+    def first_date(self) -> str:
+        """The earliest date in the segment, or None if it is empty."""
+        return min(self.dates) if self.dates else None
+
+    @property
+    def last_date(self) -> str:
+        """The latest date in the segment, or None if it is empty."""
+        return max(self.dates) if self.dates else None
+
+    def offset_for(self, start: date, end: date) -> int:
+        """Returns the offset of the first line dated within [start, end], or None if the segment has no such lines."""
+        dates = sorted(self.dates)
+        idx = bisect_left(dates, start.isoformat())
+        if idx == len(dates) or dates[idx] > end.isoformat():
+            return None
+        return self.dates[dates[idx]]
+
+
+def list_segments(path: str, include_active: bool = True) -> list[str]:
+    """Returns the rotated segments of the log at path, oldest first, followed by the active log itself."""
+    segments = []
+    for segment in glob.glob(glob.escape(path) + ".*"):
+        if segment.endswith(INDEX_SUFFIX) or segment.endswith(".tmp"):
+            continue
+        index = SegmentIndex(segment)
+        index.refresh()
+        # Segments rotated by size can share a first date, the one written last was rotated last
+        segments.append((index.first_date or "", os.path.getmtime(segment), segment))
+    segments.sort()
+
+    result = [segment for _, _, segment in segments]
+    if include_active and os.path.exists(path):
+        result.append(path)
+    return result
+
+
+def iter_records(path: str, start: date, end: date, include_active: bool = True):
+    """Yields the LogRecords dated within [start, end], reading only the segments and byte ranges that contain them."""
+    for segment in list_segments(path, include_active):
+        index = SegmentIndex(segment)
+        index.refresh()
+        offset = index.offset_for(start, end)
+        if offset is None:
+            continue
+
+        opener = gzip.open if segment.endswith(".gz") else open
+        with opener(segment, "rb") as f:
+            f.seek(offset)
+            for line in f:
+                record = parse_log_line(line.decode("utf-8", errors="replace"))
+                if record is None:
+                    continue
+                day = record.time.date()
+                if day > end:
+                    break
+                if day >= start:
+                    yield record
+
+
+def rotate_segment(path: str, compress: bool = False) -> str:
+    """Moves the active log at path to a dated segment (gzipped if compress is True) and returns the segment's path."""
+    index = SegmentIndex(path)
+    index.refresh()
+
+    base = f"{path}.{index.first_date or date.today().isoformat()}"
+    segment, n = base, 1
+    while os.path.exists(segment) or os.path.exists(segment + ".gz"):
+        segment = f"{base}.{n}"
+        n += 1
+
+    os.replace(path, segment)
+    if compress:
+        with open(segment, "rb") as src, gzip.open(segment + ".gz", "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(segment)
+        segment += ".gz"
+
+    # The index offsets are into the uncompressed data, so they stay valid after gzip
+    index.path, index.index_path = segment, segment + INDEX_SUFFIX
+    index.save()
+    try:
+        os.remove(path + INDEX_SUFFIX)
+    except FileNotFoundError:
+        pass
+    return segment
@@ -1,32 +1,143 @@
 # logger.py
 
-from datetime import datetime, timedelta
+import atexit
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
 from morning_greetings.contacts import Contact
+from morning_greetings.log_records import LogRecord, format_record, to_json
+from morning_greetings.log_segments import SegmentIndex, iter_records, rotate_segment
+from morning_greetings.sent_index import get_sent_index
+
+LOG_FILE = "log.txt"
+FSYNC_POLICIES = ("never", "flush", "always")
+
+
+class LogWriter:
+    def __init__(self, path: str = LOG_FILE, flush_interval: float = 1.0, flush_size: int = 100,
+                 fsync: str = "never", rotate_daily: bool = False, max_bytes: int = None,
+                 compress: bool = False) -> None:
+        """Initiates the LogWriter, which keeps the log open and writes records in batches.
+
+        Buffered records are written once flush_size of them are waiting or flush_interval seconds
+        have passed since the last write. fsync is "never", "flush" (after every batch) or
+        "always" (every record is written and synced straight away).
+
+        With rotate_daily and/or max_bytes the log is moved to a dated segment (gzipped if compress
+        is True) when the date changes or it would grow past max_bytes."""
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Invalid fsync policy: {fsync}. Expected one of {', '.join(FSYNC_POLICIES)}.")
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.fsync = fsync
+        self.rotate_daily = rotate_daily
+        self.max_bytes = max_bytes
+        self.compress = compress
+
+        # The date of the last record and the size of the active segment, to know when to rotate
+        index = SegmentIndex(path)
+        index.refresh()
+        self._segment_date = index.last_date
+        self._file = open(path, "a", encoding="utf-8")
+        self._size = self._file.tell()
+
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        # Messages can be sent from several threads at once
+        self._lock = threading.Lock()
+
+    def _should_rotate(self, day: str, size: int) -> bool:
+        if self._size == 0:
+            return False
+        if self.rotate_daily and self._segment_date is not None and day != self._segment_date:
+            return True
+        return self.max_bytes is not None and self._size + size > self.max_bytes
+
+    def _rotate(self) -> None:
+        self._flush()
+        self._file.close()
+        rotate_segment(self.path, self.compress)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._size = 0
+
+    def write(self, record: LogRecord) -> None:
+        """Adds a record to the buffer, writing the buffer out if it is due."""
+        line = to_json(record) + "\n"
+        size = len(line.encode("utf-8"))
+        day = record.time.date().isoformat()
+        with self._lock:
+            if self._should_rotate(day, size):
+                self._rotate()
+            self._buffer.append(line)
+            self._size += size
+            self._segment_date = day
+            if (self.fsync == "always" or len(self._buffer) >= self.flush_size
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self._flush()
+
+    def _flush(self) -> None:
+        if self._buffer:
+            self._file.write("".join(self._buffer))
+            self._buffer = []
+        self._file.flush()
+        if self.fsync != "never":
+            os.fsync(self._file.fileno())
+        self._last_flush = time.monotonic()
+
+    def flush(self) -> None:
+        """Writes out all buffered records."""
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        """Writes out all buffered records and closes the log."""
+        with self._lock:
+            if not self._file.closed:
+                self._flush()
+                self._file.close()
+
+
+_log_writer = None
+
+
+def get_log_writer() -> LogWriter:
+    """Returns the shared LogWriter for log.txt, opening it on first use."""
+    global _log_writer
+    if _log_writer is None:
+        _log_writer = LogWriter(rotate_daily=True)
+        atexit.register(_log_writer.close)
+    return _log_writer
+
+
+def set_log_writer(writer: LogWriter) -> None:
+    """Replaces the shared LogWriter, e.g. in a worker process that needs its own."""
+    global _log_writer
+    _log_writer = writer
+
+
+def query_logs(start: date, end: date, path: str = LOG_FILE):
+    """Yields the LogRecords dated from start to end (inclusive), across rotated segments and the active log."""
+    if _log_writer is not None and _log_writer.path == path:
+        _log_writer.flush()
+    yield from iter_records(path, start, end)
+
 
 def log_message(c: Contact, msg: str):
-    with open("log.txt", "a") as f:
-        f.write(f"{datetime.now()} - Sent to {c.name} ({c.email}): {msg}\n")
+    now = datetime.now()
+    get_log_writer().write(LogRecord(now, c.name, c.email, msg))
+    # Keep the sent-index in sync so the next lookup doesn't have to re-read the log
+    get_sent_index().add(c.email, now.date(), now.timestamp())
 
 def print_logs():
     """Print log entries from today and the previous day."""
-    today = datetime.now()
+    today = datetime.now().date()
     yesterday = today - timedelta(days=1)
 
-    try:
-        with open("log.txt", "r") as log_file:
-            for line in log_file:
-                # The log timestamp is the first part of the line (before ' - Sent to ')
-                log_time_str = line.split(" - ")[0].strip()
-                
-                # Convert the timestamp string to a datetime object
-                try:
-                    log_time = datetime.strptime(log_time_str, "%Y-%m-%d %H:%M:%S.%f")
-                except ValueError:
-                    # Handle cases where the microseconds might not be included in the log
-                    log_time = datetime.strptime(log_time_str, "%Y-%m-%d %H:%M:%S")
-                
-                # If the log is from today or yesterday, print it
-                if log_time.date() in [today.date(), yesterday.date()]:
-                    print(line.strip())
-    except FileNotFoundError:
-        print("Log file not found.")
\ No newline at end of file
+    found = False
+    for record in query_logs(yesterday, today):
+        print(format_record(record))
+        found = True
+    if not found:
+        print("No log entries found.")
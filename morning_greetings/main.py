@@ -1,43 +1,35 @@
 # main.py
 
 from morning_greetings.contacts import ContactList, Contact
-from morning_greetings.logger import print_logs
-from morning_greetings.message_generator import message_generator
-from morning_greetings.message_sender import send_message
+from morning_greetings.dispatcher import dispatch
+from morning_greetings.journal import ChangeJournal, JOURNAL_FILE
+from morning_greetings.ledger import LEDGER_FILE, SendLedger, by_day
+from morning_greetings.logger import get_log_writer, print_logs
+from morning_greetings.message_generator import generate_messages
+from morning_greetings.metrics import get_metrics
+from morning_greetings.scheduler import SendScheduler
+from morning_greetings.sent_index import SentIndex, get_sent_index
+from morning_greetings.storage import SQLiteContactStore
+from morning_greetings.transport import Transport, transport_from_env
 from datetime import datetime, timedelta
+import os
+import time
 
+# Number of messages sent at the same time
+CONCURRENCY = int(os.environ.get("MORNING_GREETINGS_CONCURRENCY", "8"))
 
-def send_message_to_contact(contact: Contact):
-    """Sends a message to a contact if not already sent today."""
-    if not message_already_sent_today(contact):
-        msg = message_generator(contact)
-        send_message(contact, msg)
-        print(f"Message sent to {contact.name} at {datetime.now()}.")
-    else:
-        print(f"Message already sent to {contact.name} today. Skipping...")
 
+def send_message_to_contact(contact: Contact, transport: Transport = None) -> dict:
+    """Sends a message to a contact if not already sent today, claiming it in the ledger like any other send."""
+    return send_messages([contact], transport)
 
-def message_already_sent_today(contact: Contact) -> bool:
-    """Check if a message has already been sent to this contact today, using the email."""
-    today = datetime.now().date()
 
-    try:
-        with open("log.txt", "r") as log_file:
-            for line in log_file:
-                log_time_str, log_details = line.split(" - Sent to ")
-                log_date = datetime.strptime(log_time_str.strip(), "%Y-%m-%d %H:%M:%S.%f").date()
-
-                # Extract the email from the log entry (log format: "Name (email)")
-                start_email_idx = log_details.find("(") + 1
-                end_email_idx = log_details.find(")")
-                log_email = log_details[start_email_idx:end_email_idx]
-
-                if log_date == today and log_email == contact.email:
-                    return True
-    except FileNotFoundError:
-        return False
-    
-    return False
+def message_already_sent_today(contact: Contact, sent_index: SentIndex = None) -> bool:
+    """Check if a message has already been sent to this contact today, using the email."""
+    if sent_index is None:
+        sent_index = get_sent_index()
+        sent_index.refresh()
+    return sent_index.contains(contact.email)
 
 # CRUD Functions for Managing Contacts
 
@@ -47,11 +39,12 @@ def add_contact(my_contacts: ContactList):
         name = input("Enter contact's name: ").strip()
         email = input("Enter contact's email: ").strip()
         preferred_time = input("Enter preferred time (e.g., 08:00 AM): ").strip()
+        timezone = input("Enter timezone (e.g., Europe/Oslo, leave blank for local time): ").strip()
 
         if preferred_time == "":
-            my_contacts.add_contact(name, email)
+            my_contacts.add_contact(name, email, timezone=timezone)
         else:
-            my_contacts.add_contact(name, email, preferred_time)
+            my_contacts.add_contact(name, email, preferred_time, timezone)
 
         print(f"Contact '{name}' added successfully.")
     except ValueError as e:
@@ -65,21 +58,22 @@ def view_contacts(my_contacts: ContactList):
     else:
         print("\nList of Contacts:")
         for idx, contact in enumerate(contacts, start=1):
-            print(f"{idx}. Name: {contact.name}, Email: {contact.email}, Preferred Time: {contact.preferred_time}")
+            print(f"{idx}. Name: {contact.name}, Email: {contact.email}, Preferred Time: {contact.preferred_time}, "
+                  f"Timezone: {contact.timezone or 'local'}")
 
 def update_contact(my_contacts: ContactList):
     """Update an existing contact, using either the email or name to find the contact."""
     try:
         search_key = input("\nEnter the contact's name or email to update: ").strip()
 
-        matching_contacts = [c for c in my_contacts.get_contacts() if c.email == search_key]
-
-        if not matching_contacts:
-            matching_contacts = [c for c in my_contacts.get_contacts() if c.name.lower() == search_key.lower()]
-
-        if not matching_contacts:
-            print(f"No contact found with name or email '{search_key}'.")
-            return
+        try:
+            matching_contacts = [my_contacts.find_contact_by_email(search_key)]
+        except ValueError:
+            try:
+                matching_contacts = my_contacts.find_contact_by_name(search_key, ignore_case=True)
+            except ValueError:
+                print(f"No contact found with name or email '{search_key}'.")
+                return
 
         if len(matching_contacts) > 1:
             print("\nMultiple contacts found with the same name:")
@@ -98,11 +92,14 @@ def update_contact(my_contacts: ContactList):
         print(f"\nUpdating contact: {contact.name} ({contact.email})")
         new_email = input(f"Enter new email (leave blank to keep '{contact.email}'): ").strip()
         new_time = input(f"Enter new preferred time (leave blank to keep '{contact.preferred_time}'): ").strip()
+        new_timezone = input(f"Enter new timezone (leave blank to keep '{contact.timezone or 'local'}', "
+                             f"'local' for local time): ").strip()
+        if new_timezone == "local":
+            new_timezone = ""
+        elif new_timezone == "":
+            new_timezone = None
 
-        if new_email:
-            contact.email = new_email
-        if new_time:
-            contact.preferred_time = new_time
+        my_contacts.update_contact(contact.email, preferred_time=new_time, new_email=new_email, timezone=new_timezone)
 
         print(f"Contact '{contact.name}' updated successfully.")
     except ValueError as e:
@@ -123,37 +120,140 @@ def delete_contact(my_contacts: ContactList):
 
 # Send messages
 
-def force_send_all(my_contacts: ContactList):
+def send_messages(contacts: list[Contact], transport: Transport = None, concurrency: int = None,
+                  ledger_path: str = LEDGER_FILE, occurrences: dict[str, tuple[float, str]] = None) -> dict:
+    """Send a message to each contact not already messaged today, several at a time, and return a run summary.
+
+    Each message is claimed in the ledger before it is sent, like in a --workers run, so another
+    run sending at the same time skips it. occurrences, from SendScheduler.occurrences(), makes a
+    contact count as sent if it was messaged since its window opened, and claims it for the
+    window's day, so windows that cross midnight are neither sent twice nor skipped."""
+    metrics = get_metrics()
+    sent_index = get_sent_index()
+    today = datetime.now().date().isoformat()
+    days = {email: day for email, (_, day) in occurrences.items()} if occurrences is not None else {}
+    ledger = SendLedger(ledger_path)
+
+    try:
+        to_send = []
+        with metrics.time("dedupe_check"):
+            sent_index.refresh()
+            for c in contacts:
+                if occurrences is not None:
+                    already_sent = sent_index.sent_since(c.email, occurrences[c.email][0])
+                else:
+                    already_sent = message_already_sent_today(c, sent_index)
+                if not already_sent:
+                    to_send.append(c)
+                else:
+                    print(f"Message already sent to {c.name} {'in this window' if occurrences else 'today'}. Skipping...")
+            if to_send:
+                claimed = set()
+                for day, emails in by_day([c.email for c in to_send], days, today).items():
+                    claimed |= ledger.claim_many(day, emails)
+                for c in to_send:
+                    if c.email not in claimed:
+                        print(f"Message to {c.name} is being sent by another run. Skipping...")
+                to_send = [c for c in to_send if c.email in claimed]
+        metrics.inc("contacts_checked_total", len(contacts))
+        metrics.inc("messages_skipped_total", len(contacts) - len(to_send))
+
+        with metrics.time("message_generation"):
+            jobs = list(zip(to_send, generate_messages(to_send)))
+        metrics.inc("messages_generated_total", len(jobs))
+
+        result = {"sent": 0, "failed": 0, "skipped": len(contacts) - len(jobs)}
+        if jobs:
+            own_transport = transport is None
+            if own_transport:
+                transport = transport_from_env(concurrency or CONCURRENCY)
+            try:
+                summary = dispatch(jobs, transport, concurrency or CONCURRENCY)
+            finally:
+                # Write the pass's records out now rather than when the next record comes in, which in
+                # scheduled sending can be hours later; other processes read the log to skip sent contacts
+                get_log_writer().flush()
+                if own_transport:
+                    transport.close()
+            print(summary)
+            result.update(summary.as_dict())
+            # Failed sends give up their claim so a later pass can try them again
+            failed = {c.email for c, _ in summary.failed}
+            for day, emails in by_day([c.email for c in to_send], days, today).items():
+                ledger.mark_sent(day, [email for email in emails if email not in failed])
+                ledger.release(day, [email for email in emails if email in failed])
+    finally:
+        ledger.close()
+    sent_index.save()
+    return result
+
+def force_send_all(my_contacts: ContactList, transport: Transport = None, concurrency: int = None) -> dict:
     """Force send messages to all contacts regardless of preferred time."""
-    for c in my_contacts.get_contacts():
-        if not message_already_sent_today(c):
-            msg = message_generator(c)
-            send_message(c, msg)
-        else:
-            print(f"Message already sent to {c.name} today. Skipping...")
-
-def send_appropriate_messages(my_contacts: ContactList):
-    """Send messages only to contacts whose preferred time is within the 15-minute window."""
-    for c in my_contacts.get_contacts():
-        if not message_already_sent_today(c):
-            time_check = check_time_window(c)
-
-            if time_check[0]:
-                msg = message_generator(c)
-                send_message(c, msg)
-            elif time_check[1] == "before":
-                print(f"Preferred time for {c.name} ({c.preferred_time}) is before the relevant window.")
-            elif time_check[1] == "after":
-                print(f"Preferred time for {c.name} ({c.preferred_time}) is after the relevant window.")
-        else:
-            print(f"Message already sent to {c.name} today. Skipping...")
+    return send_messages(my_contacts.get_contacts(), transport, concurrency)
+
+def send_appropriate_messages(my_contacts: ContactList, scheduler: SendScheduler = None,
+                              transport: Transport = None, concurrency: int = None, now: datetime = None) -> dict:
+    """Send messages only to contacts whose preferred time, in their timezone, is within the 15-minute
+    window around now (the current time by default)."""
+    own_scheduler = scheduler is None
+    if own_scheduler:
+        scheduler = SendScheduler(my_contacts)
+
+    try:
+        # Only the contacts in the window are looked at, the rest are counted. The sent-index leaves out
+        # contacts already messaged in their window, also by another run or before midnight.
+        sent_index = get_sent_index()
+        with get_metrics().time("window_check"):
+            sent_index.refresh()
+            due = scheduler.due(now, sent_index)
+        result = send_messages(due, transport, concurrency, occurrences=scheduler.occurrences(due))
+        # Failed sends stay due, so the next pass in the window tries them again
+        failed = set(result.get("failed_emails", ()))
+        scheduler.mark_sent([c for c in due if c.email not in failed])
+    finally:
+        if own_scheduler:
+            scheduler.close()
+
+    result["not_due"] = len(my_contacts) - len(due)
+    if result["not_due"]:
+        print(f"{result['not_due']} contact(s) have a preferred time outside the relevant window.")
+    return result
+
+
+def run_scheduled_sending(my_contacts: ContactList, scheduler: SendScheduler = None, max_sleep: float = 300):
+    """Keep sending messages as contacts' preferred times come up, sleeping in between, until Ctrl+C."""
+    own_scheduler = scheduler is None
+    if own_scheduler:
+        scheduler = SendScheduler(my_contacts)
+
+    # One transport for the whole run, so its connections are reused between passes
+    transport = transport_from_env(CONCURRENCY)
+
+    print("Running scheduled sending. Press Ctrl+C to stop.")
+    try:
+        while True:
+            send_appropriate_messages(my_contacts, scheduler, transport)
+
+            # Sleep until the next preferred time enters the window, but wake up at least every
+            # max_sleep seconds so the loop notices the date changing
+            delay = scheduler.seconds_until_next()
+            delay = max_sleep if delay is None else min(delay, max_sleep)
+            wake_time = datetime.now() + timedelta(seconds=delay)
+            print(f"Next check at {wake_time.strftime('%I:%M:%S %p')}.")
+            time.sleep(delay)
+    except KeyboardInterrupt:
+        print("\nScheduled sending stopped.")
+    finally:
+        transport.close()
+        if own_scheduler:
+            scheduler.close()
 
 
 def check_time_window(c: Contact):
-    """Check if the current time is within 15 minutes of the input time."""
-    current_time = datetime.now()
-    input_time = datetime.strptime(c.preferred_time, "%I:%M %p")
-    input_time = input_time.replace(year=current_time.year, month=current_time.month, day=current_time.day)
+    """Check if the current time, in the contact's timezone, is within 15 minutes of the input time."""
+    current_time = datetime.now(c.zone)
+    hour, minute = divmod(c.preferred_minutes, 60)
+    input_time = current_time.replace(hour=hour, minute=minute, second=0, microsecond=0)
 
     time_15_min_before = current_time - timedelta(minutes=15)
     time_15_min_after = current_time + timedelta(minutes=15)
@@ -168,10 +268,16 @@ def check_time_window(c: Contact):
 
 def main():
     # Initialize contacts
-    my_contacts = ContactList()
-    my_contacts.add_contact("Jens", "jens@python.org")
-    my_contacts.add_contact("Nils", "nils@goolge.com", "10:30 AM")
-    my_contacts.add_contact("Knut", "knut@microsoft.com", "06:43 PM")
+    store = SQLiteContactStore()
+    my_contacts = ContactList(store)
+    # Records every change for incremental sync (morning_greetings contacts changes)
+    journal = ChangeJournal(JOURNAL_FILE)
+    journal.attach(my_contacts)
+    if len(my_contacts) == 0:
+        my_contacts.add_contact("Jens", "jens@python.org")
+        my_contacts.add_contact("Nils", "nils@goolge.com", "10:30 AM")
+        my_contacts.add_contact("Knut", "knut@microsoft.com", "06:43 PM")
+    scheduler = SendScheduler(my_contacts)
 
     print(f"\nCurrent Time: {datetime.now().strftime('%I:%M %p')}\n")
     
@@ -185,9 +291,10 @@ def main():
         print("5. Update a contact")
         print("6. Delete a contact")
         print("7. Print logs from current and previous days")
-        print("8. Exit")
+        print("8. Run scheduled sending until stopped (Ctrl+C)")
+        print("9. Exit")
 
-        choice = input("\nEnter your choice (1/2/3/4/5/6/7/8): ")
+        choice = input("\nEnter your choice (1/2/3/4/5/6/7/8/9): ")
 
         try:
             if choice == '1':
@@ -196,7 +303,7 @@ def main():
 
             elif choice == '2':
                 print("\nSending messages to appropriate contacts based on their preferred time...\n")
-                send_appropriate_messages(my_contacts)
+                send_appropriate_messages(my_contacts, scheduler)
 
             elif choice == '3':
                 view_contacts(my_contacts)
@@ -215,6 +322,9 @@ def main():
                 print_logs()
 
             elif choice == '8':
+                run_scheduled_sending(my_contacts, scheduler)
+
+            elif choice == '9':
                 print("Exiting...")
                 break
 
@@ -222,6 +332,12 @@ def main():
                 print("Invalid choice. Please enter a valid option.")
         except Exception as e:
             print(f"An error occurred: {e}. Please try again.")
+        finally:
+            # Save this option's changes to the contacts in one transaction
+            store.flush()
+
+    store.close()
+    journal.close()
 
 
 if __name__ == "__main__":
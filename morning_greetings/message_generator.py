@@ -1,19 +1,13 @@
 # message_generator.py
 
-from datetime import datetime
 from morning_greetings.contacts import Contact
+from morning_greetings.templates import get_engine
 
-def message_generator(c: Contact):
-    # Parse the preferred time string ("08:00 AM")
-    time = datetime.strptime(c.preferred_time, "%I:%M %p")
-    
-    # Extract the hour to determine the time of day
-    hour = time.hour
+def message_generator(c: Contact, locale: str = None):
+    # The contact's time band (morning, afternoon or evening) is worked out when its preferred
+    # time is set, so this only has to fill in the compiled template for that band
+    return get_engine().render(c, locale)
 
-    # Generate message based on the time of day
-    if 5 <= hour < 12:  # Morning (5 AM - 12 PM)
-        return f"Good morning {c.name}, hope you have a great day!"
-    elif 12 <= hour < 18:  # Afternoon (12 PM - 6 PM)
-        return f"Good afternoon {c.name}, hope you're having a productive day!"
-    else:  # Evening (6 PM - 5 AM)
-        return f"Good evening {c.name}, hope you're winding down and relaxing!"
\ No newline at end of file
+def generate_messages(contacts: list[Contact], locale: str = None) -> list[str]:
+    """Generate messages for a list of contacts in one pass."""
+    return get_engine().render_batch(contacts, locale)
@@ -2,9 +2,24 @@
 
 from morning_greetings.contacts import Contact
 from morning_greetings.logger import log_message
+from morning_greetings.metrics import get_metrics
+from morning_greetings.transport import PrintTransport, Transport
 
-def send_message(c: Contact, msg: str):
+default_transport = PrintTransport()
+metrics = get_metrics()
+
+def deliver_message(c: Contact, msg: str, transport: Transport = None):
+    """Hands the message to the transport, without logging it. Safe to retry."""
     if not c.email:
         raise ValueError("Email address missing")
-    print(f"Sending message to {c.email}: {msg}")
-    log_message(c, msg)
\ No newline at end of file
+    with metrics.time("transport_send"):
+        (transport or default_transport).send(c, msg)
+
+def record_message(c: Contact, msg: str):
+    """Logs a delivered message, which also marks it as sent today."""
+    with metrics.time("log_write"):
+        log_message(c, msg)
+
+def send_message(c: Contact, msg: str, transport: Transport = None):
+    deliver_message(c, msg, transport)
+    record_message(c, msg)
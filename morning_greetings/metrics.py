@@ -0,0 +1,147 @@
+# metrics.py
+
+import json
+import threading
+import time
+from bisect import bisect_left
+
+# The stages of the send pipeline that are timed
+STAGES = ("dedupe_check", "window_check", "message_generation", "transport_send", "log_write")
+
+# Upper bounds in seconds, from 10 microseconds (a cached lookup) to 10 seconds (a slow SMTP server)
+LATENCY_BUCKETS = (0.00001, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS) -> None:
+        """Initiates the Histogram with fixed bucket upper bounds; the last, implicit bucket is +Inf."""
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Adds a value to the bucket for the smallest upper bound that is at least value."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def as_dict(self) -> dict:
+        """Returns the histogram as a JSON-friendly dict, with cumulative bucket counts as Prometheus has them."""
+        cumulative, total = {}, 0
+        for bound, count in zip(self.buckets + ("+Inf",), self.counts):
+            total += count
+            cumulative[str(bound)] = total
+        return {"count": self.count, "sum": self.sum, "buckets": cumulative}
+
+
+class _Timer:
+    # A plain class rather than contextlib.contextmanager, which is several times slower per use
+    __slots__ = ("metrics", "stage", "start")
+
+    def __init__(self, metrics, stage: str) -> None:
+        self.metrics = metrics
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.metrics.observe(self.stage, time.perf_counter() - self.start)
+
+
+class Metrics:
+    def __init__(self) -> None:
+        """Initiates the Metrics registry with counters and a latency histogram per stage.
+
+        Sends run on several threads, so updates are made under a lock."""
+        self.counters = {}
+        self.histograms = {stage: Histogram() for stage in STAGES}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, amount: int = 1) -> None:
+        """Adds amount to the counter name."""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Records how long one run of a stage took."""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+
+    def time(self, stage: str) -> _Timer:
+        """Returns a context manager that records the time spent in its block under stage."""
+        return _Timer(self, stage)
+
+    def reset(self) -> None:
+        """Clears all counters and histograms."""
+        with self._lock:
+            self.counters = {}
+            self.histograms = {stage: Histogram() for stage in STAGES}
+
+    def snapshot(self) -> dict:
+        """Returns the raw counts, for merge() in another process."""
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": {stage: (h.buckets, list(h.counts), h.sum, h.count)
+                               for stage, h in self.histograms.items()},
+            }
+
+    def merge(self, snapshot: dict) -> None:
+        """Adds a snapshot() from another process, e.g. a sharding worker, to this registry."""
+        with self._lock:
+            for name, value in snapshot["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for stage, (buckets, counts, total, count) in snapshot["histograms"].items():
+                histogram = self.histograms.get(stage)
+                if histogram is None:
+                    histogram = self.histograms[stage] = Histogram(tuple(buckets))
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.sum += total
+                histogram.count += count
+
+    def as_dict(self) -> dict:
+        """Returns the counters and stage histograms as a JSON-friendly dict."""
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "stages": {stage: h.as_dict() for stage, h in self.histograms.items()},
+            }
+
+    def to_prometheus(self, prefix: str = "morning_greetings") -> str:
+        """Returns the metrics in the Prometheus text exposition format."""
+        data = self.as_dict()
+        lines = []
+        for name, value in sorted(data["counters"].items()):
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            lines.append(f"{prefix}_{name} {value}")
+
+        metric = f"{prefix}_stage_duration_seconds"
+        lines.append(f"# HELP {metric} Time spent in each stage of the send pipeline.")
+        lines.append(f"# TYPE {metric} histogram")
+        for stage, histogram in data["stages"].items():
+            for bound, count in histogram["buckets"].items():
+                lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {histogram["sum"]}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {histogram["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> None:
+        """Writes the metrics to path, as JSON if it ends in .json and as Prometheus text otherwise."""
+        text = json.dumps(self.as_dict(), indent=2) if path.endswith(".json") else self.to_prometheus()
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text)
+
+
+# Created up front rather than on first use, since the first use can be on a sending thread
+_metrics = Metrics()
+
+
+def get_metrics() -> Metrics:
+    """Returns the shared Metrics registry."""
+    return _metrics
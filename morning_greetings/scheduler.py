@@ -0,0 +1,160 @@
+# scheduler.py
+
+import heapq
+from datetime import datetime, time, timedelta
+from morning_greetings.contacts import Contact, ContactList, get_zone
+from morning_greetings.sent_index import SentIndex
+
+WINDOW_MINUTES = 15
+WINDOW_SECONDS = WINDOW_MINUTES * 60
+
+
+def next_fire(timezone: str, minutes: int, after: float) -> float:
+    """Returns the UTC timestamp of the first occurrence of minutes (since local midnight) in
+    timezone whose 15-minute window has not ended at timestamp after. An empty or None timezone
+    means the server's local time.
+
+    DST is taken into account. A time skipped by a spring-forward change fires at the same
+    wall-clock offset after the change, and a time repeated in autumn fires at the first one."""
+    zone = get_zone(timezone) if timezone else None
+    # Start from the day before, since yesterday's window can still be open just after midnight
+    day = datetime.fromtimestamp(after, zone).date() - timedelta(days=1)
+    at = time(minutes // 60, minutes % 60)
+    while True:
+        # A naive datetime's timestamp() uses the local timezone, including its DST rules
+        fire = datetime.combine(day, at, tzinfo=zone).timestamp()
+        if fire + WINDOW_SECONDS >= after:
+            return fire
+        day += timedelta(days=1)
+
+
+class SendScheduler:
+    def __init__(self, contact_list: ContactList, now: datetime = None) -> None:
+        """Initiates the SendScheduler, which keeps a heap of upcoming send times in UTC.
+
+        Contacts with the same timezone and preferred time share one group and one heap entry,
+        so the heap holds at most one entry per (timezone, minute) in use."""
+        self.groups = {}      # (timezone, minutes) -> {email: Contact}
+        self._group_of = {}   # email -> (timezone, minutes)
+        self._scheduled = {}  # group -> UTC timestamp of its entry in the heap
+        self._heap = []       # (UTC timestamp, group)
+        self._active = {}     # group -> [window end timestamp, set of emails already sent]
+        self._now = (now or datetime.now()).timestamp()
+        self._contact_list = contact_list
+
+        for c in contact_list.get_contacts():
+            self._add(c)
+        # Keep the groups up to date when contacts are added, updated or removed
+        contact_list.subscribe(self.on_change)
+
+    def _add(self, c: Contact) -> None:
+        # "" rather than None for local time, so groups with the same send time compare in the heap
+        group = (c.timezone or "", c.preferred_minutes)
+        members = self.groups.get(group)
+        if members is None:
+            members = self.groups[group] = {}
+            if group not in self._scheduled and group not in self._active:
+                self._schedule(group, next_fire(*group, self._now))
+        members[c.email] = c
+        self._group_of[c.email] = group
+
+    def _remove(self, email: str) -> None:
+        group = self._group_of.pop(email, None)
+        if group is None:
+            return
+        members = self.groups[group]
+        del members[email]
+        if not members:
+            # The heap entry is left behind and skipped when popped
+            del self.groups[group]
+
+    def _schedule(self, group: tuple, fire: float) -> None:
+        self._scheduled[group] = fire
+        heapq.heappush(self._heap, (fire, group))
+
+    def on_change(self, event: str, contact: Contact, old_email: str) -> None:
+        """ContactList listener that moves contacts between groups."""
+        if event in ("update", "remove"):
+            self._remove(old_email)
+        if event in ("add", "update"):
+            self._add(contact)
+
+    def _advance(self, now: float) -> None:
+        self._now = now
+        # Move groups whose window has opened from the heap to the active set
+        while self._heap and self._heap[0][0] - WINDOW_SECONDS <= now:
+            fire, group = heapq.heappop(self._heap)
+            if self._scheduled.get(group) != fire:
+                continue  # stale entry
+            del self._scheduled[group]
+            if group not in self.groups:
+                continue  # no contacts left in the group
+
+            if fire + WINDOW_SECONDS >= now:
+                self._active[group] = [fire + WINDOW_SECONDS, set()]
+            # Tomorrow's (or the next) send time goes straight back on the heap
+            timezone, minutes = group
+            self._schedule(group, next_fire(timezone, minutes, fire + WINDOW_SECONDS + 1))
+
+        for group in [g for g, (window_end, _) in self._active.items() if window_end < now]:
+            del self._active[group]
+
+    def due(self, now: datetime = None, sent_index: SentIndex = None) -> list[Contact]:
+        """Returns the contacts whose preferred time, in their own timezone, is within 15 minutes
+        of now and who haven't been marked as sent in this window.
+
+        With a sent_index, contacts it has a message for since their window opened are left out
+        too. That covers sends by other processes, like an earlier cron run, and windows that cross
+        midnight, which the sent-index's per-day sets would otherwise send to again after 12 AM."""
+        self._advance((now or datetime.now()).timestamp())
+
+        contacts = []
+        for group, (window_end, sent) in self._active.items():
+            opened = window_end - 2 * WINDOW_SECONDS
+            for email, c in self.groups.get(group, {}).items():
+                if email in sent or (sent_index is not None and sent_index.sent_since(email, opened)):
+                    continue
+                contacts.append(c)
+        return contacts
+
+    def occurrences(self, contacts: list[Contact]) -> dict[str, tuple[float, str]]:
+        """Returns {email: (window open timestamp, day)} for contacts returned by the last due(), where
+        day is the "YYYY-MM-DD" date of the preferred time on the contact's own clock.
+
+        Together they identify the send, so it can be checked and claimed as that window's message
+        instead of as today's, which is a different day on either side of midnight."""
+        result = {}
+        for c in contacts:
+            group = self._group_of[c.email]
+            fire = self._active[group][0] - WINDOW_SECONDS
+            zone = get_zone(group[0]) if group[0] else None
+            result[c.email] = (fire - WINDOW_SECONDS, datetime.fromtimestamp(fire, zone).date().isoformat())
+        return result
+
+    def mark_sent(self, contacts: list[Contact]) -> None:
+        """Records that contacts were messaged, so due() leaves them out for the rest of the window."""
+        for c in contacts:
+            active = self._active.get(self._group_of.get(c.email))
+            if active is not None:
+                active[1].add(c.email)
+
+    def close(self) -> None:
+        """Stops following changes to the contact list. Call this when done with a scheduler that
+        was made for one pass, since the list otherwise keeps it alive and up to date."""
+        self._contact_list.unsubscribe(self.on_change)
+
+    def seconds_until_next(self, now: datetime = None) -> float:
+        """Returns the seconds until the next group's window opens, or None if there are no contacts."""
+        # Drop stale entries so the top of the heap is a real send time
+        while self._heap:
+            fire, group = self._heap[0]
+            if self._scheduled.get(group) == fire and group in self.groups:
+                break
+            heapq.heappop(self._heap)
+            if self._scheduled.get(group) == fire:
+                del self._scheduled[group]
+        if not self._heap:
+            return None
+
+        now = (now or datetime.now()).timestamp()
+        return max(self._heap[0][0] - WINDOW_SECONDS - now, 0.0)
@@ -0,0 +1,124 @@
+# sent_index.py
+
+import json
+import os
+from datetime import date, datetime, timedelta
+from morning_greetings.log_records import parse_log_line
+from morning_greetings.log_segments import iter_records
+
+LOG_FILE = "log.txt"
+INDEX_FILE = "sent_index.json"
+# Only today and yesterday (for send windows that cross midnight) are ever looked up
+KEEP_DAYS = 2
+
+
+class SentIndex:
+    def __init__(self, log_path: str = LOG_FILE, index_path: str = INDEX_FILE) -> None:
+        """Initiates the SentIndex class with the log it indexes and the file it is saved to."""
+        self.log_path = log_path
+        self.index_path = index_path
+        self.offset = 0
+        self.inode = None
+        self.sent = {}  # "YYYY-MM-DD" -> set of emails
+        self.last_sent = {}  # email -> timestamp of the latest message, within the same days
+        self.load()
+
+    def load(self) -> None:
+        """Loads the saved index (if any) and catches up with the end of the log."""
+        try:
+            with open(self.index_path, "r") as f:
+                data = json.load(f)
+            self.offset = data["offset"]
+            self.inode = data["inode"]
+            oldest = self._oldest_kept()
+            self.sent = {d: set(emails) for d, emails in data["sent"].items() if d >= oldest}
+            self.last_sent = dict(data["last_sent"])
+        except (FileNotFoundError, ValueError, KeyError, TypeError, AttributeError):
+            self.offset, self.inode, self.sent, self.last_sent = 0, None, {}, {}
+            # Messages sent earlier may already be in rotated log segments
+            today = datetime.now().date()
+            for record in iter_records(self.log_path, today - timedelta(days=KEEP_DAYS - 1), today,
+                                       include_active=False):
+                if record.email is not None:
+                    self.add(record.email, record.time.date(), record.time.timestamp())
+        self.refresh()
+        self.prune()
+
+    def refresh(self) -> None:
+        """Reads only the log lines appended since the last refresh."""
+        try:
+            stat = os.stat(self.log_path)
+        except FileNotFoundError:
+            return
+
+        # The log was replaced or truncated, so start over from the beginning of the new file
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.inode = stat.st_ino
+            self.offset = 0
+
+        with open(self.log_path, "rb") as log_file:
+            log_file.seek(self.offset)
+            for line in log_file:
+                # Stop at a partially written last line, it is read again on the next refresh
+                if not line.endswith(b"\n"):
+                    break
+                self.offset += len(line)
+                record = parse_log_line(line.decode("utf-8", errors="replace"))
+                # Old lines without an email can't be matched against a contact
+                if record is not None and record.email is not None:
+                    self.add(record.email, record.time.date(), record.time.timestamp())
+
+    def _oldest_kept(self) -> str:
+        return (datetime.now().date() - timedelta(days=KEEP_DAYS - 1)).isoformat()
+
+    def prune(self) -> None:
+        """Drops the dates older than KEEP_DAYS, so the index stays the size of a day or two of sends."""
+        oldest = self._oldest_kept()
+        for day in [d for d in self.sent if d < oldest]:
+            del self.sent[day]
+        cutoff = datetime.fromisoformat(oldest).timestamp()
+        self.last_sent = {email: at for email, at in self.last_sent.items() if at >= cutoff}
+
+    def add(self, email: str, day: date = None, at: float = None) -> None:
+        """Records that a message was sent to email on day (today by default). at is the timestamp
+        of the message, for sent_since."""
+        day = day or datetime.now().date()
+        self.sent.setdefault(day.isoformat(), set()).add(email)
+        if at is not None and at > self.last_sent.get(email, 0):
+            self.last_sent[email] = at
+
+    def sent_since(self, email: str, since: float) -> bool:
+        """Returns True if a message was sent to email at or after the timestamp since, e.g. since a
+        send window opened. Unlike contains, this doesn't start over at midnight."""
+        return self.last_sent.get(email, 0) >= since
+
+    def contains(self, email: str, day: date = None) -> bool:
+        """Returns True if a message was sent to email on day (today by default)."""
+        day = day or datetime.now().date()
+        return email in self.sent.get(day.isoformat(), ())
+
+    def emails_on(self, day: date = None) -> set[str]:
+        """Returns the set of emails messaged on day (today by default)."""
+        day = day or datetime.now().date()
+        return self.sent.get(day.isoformat(), set())
+
+    def save(self) -> None:
+        """Writes the index to disk so the next run only has to read new log lines."""
+        self.prune()
+        sent = {d: list(emails) for d, emails in self.sent.items()}
+
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"offset": self.offset, "inode": self.inode, "sent": sent, "last_sent": self.last_sent}, f)
+        os.replace(tmp_path, self.index_path)
+
+
+_sent_index = None
+
+
+def get_sent_index() -> SentIndex:
+    """Returns the shared SentIndex for log.txt, loading it on first use."""
+    global _sent_index
+    if _sent_index is None:
+        _sent_index = SentIndex()
+    return _sent_index
@@ -0,0 +1,170 @@
+# sharding.py
+
+import multiprocessing
+import os
+import sys
+import zlib
+from datetime import datetime
+from morning_greetings.contacts import Contact
+from morning_greetings.ledger import LEDGER_FILE, SendLedger, by_day
+
+# Fixed, so a resumed run splits the contacts the same way even with a different number of workers
+DEFAULT_SHARDS = 16
+
+
+def shard_of(email: str, shards: int) -> int:
+    """Returns the shard an email belongs to. crc32 is stable across processes, unlike hash()."""
+    return zlib.crc32(email.lower().encode("utf-8")) % shards
+
+
+def _fingerprint(rows: list[tuple]) -> int:
+    # Identifies the set of emails in a shard, independent of their order
+    fingerprint = 0
+    for row in rows:
+        fingerprint ^= zlib.crc32(row[1].encode("utf-8"))
+    return fingerprint ^ len(rows)
+
+
+def _init_worker(quiet: bool) -> None:
+    # A worker that was not forked doesn't inherit the parent's redirect_stdout, so redirect its
+    # progress messages again to keep stdout for the JSON summary
+    if quiet:
+        sys.stdout = sys.stderr
+
+
+def _run_shard(shard: int, shards: int, rows: list[tuple], fingerprint: int, day: str, days: dict[str, str],
+               ledger_path: str, concurrency: int, batch_size: int) -> dict:
+    """Sends the messages of one shard. Runs in a worker process. days has the day to claim each
+    email for where it isn't day, see run_sharded."""
+    from morning_greetings.dispatcher import dispatch
+    from morning_greetings.logger import LogWriter, set_log_writer
+    from morning_greetings.message_generator import generate_messages
+    from morning_greetings.metrics import get_metrics
+    from morning_greetings.transport import transport_from_env
+
+    # Each process appends to the log through its own writer. Rotation is left to the main
+    # process, and the writer is flushed at the end because worker processes skip atexit.
+    writer = LogWriter()
+    set_log_writer(writer)
+    ledger = SendLedger(ledger_path)
+    transport = transport_from_env(concurrency)
+    # A forked worker starts with a copy of the parent's metrics, so start over and send back only its own
+    metrics = get_metrics()
+    metrics.reset()
+
+    result = {"shard": shard, "sent": 0, "failed": 0, "skipped": 0}
+    try:
+        for start in range(0, len(rows), batch_size):
+            contacts = [Contact(*row) for row in rows[start:start + batch_size]]
+
+            # Claim before sending, so no other worker or later run sends these again
+            claimed = set()
+            for claim_day, emails in by_day([c.email for c in contacts], days, day).items():
+                claimed |= ledger.claim_many(claim_day, emails, worker=shard)
+            result["skipped"] += len(contacts) - len(claimed)
+            to_send = [c for c in contacts if c.email in claimed]
+            if not to_send:
+                continue
+
+            with metrics.time("message_generation"):
+                jobs = list(zip(to_send, generate_messages(to_send)))
+            metrics.inc("messages_generated_total", len(jobs))
+            summary = dispatch(jobs, transport, concurrency)
+            writer.flush()
+            failed = {c.email for c, _ in summary.failed}
+            for claim_day, emails in by_day([c.email for c in to_send], days, day).items():
+                ledger.mark_sent(claim_day, [email for email in emails if email not in failed])
+                ledger.release(claim_day, [email for email in emails if email in failed])
+            result["sent"] += summary.sent
+            result["failed"] += len(failed)
+
+        if result["failed"] == 0:
+            ledger.mark_shard_done(day, shards, shard, fingerprint)
+    finally:
+        writer.close()
+        transport.close()
+        ledger.close()
+    result["metrics"] = metrics.snapshot()
+    return result
+
+
+def run_sharded(contacts: list[Contact], workers: int = None, shards: int = DEFAULT_SHARDS,
+                ledger_path: str = LEDGER_FILE, concurrency: int = 8, batch_size: int = 50,
+                occurrences: dict[str, tuple[float, str]] = None) -> dict:
+    """Sends messages to contacts from a pool of worker processes, each handling whole shards.
+
+    Every send is claimed in the ledger first, so a message goes out at most once per contact
+    per day, even with several runs at once or after a crash. Shards already completed today
+    (with the same contacts) are skipped. occurrences, from SendScheduler.occurrences(), checks
+    and claims each contact for its send window instead of for today, like in send_messages.
+    Returns a run summary."""
+    from concurrent.futures import ProcessPoolExecutor
+    from morning_greetings.logger import get_log_writer
+    from morning_greetings.metrics import get_metrics
+    from morning_greetings.sent_index import get_sent_index
+
+    day = datetime.now().date().isoformat()
+    workers = workers or os.cpu_count() or 1
+
+    metrics = get_metrics()
+    sent_index = get_sent_index()
+    sent_index.refresh()
+    sent_index.save()
+    sent_today = sent_index.emails_on()
+    days = {email: claim_day for email, (_, claim_day) in occurrences.items()} if occurrences is not None else {}
+
+    def already_sent(email: str) -> bool:
+        if occurrences is not None:
+            return sent_index.sent_since(email, occurrences[email][0])
+        return email in sent_today
+
+    partitions = [[] for _ in range(shards)]
+    for c in contacts:
+        partitions[shard_of(c.email, shards)].append((c.name, c.email, c.preferred_time, c.timezone))
+
+    ledger = SendLedger(ledger_path)
+    completed = ledger.completed_shards(day, shards)
+    pending, skipped = [], 0
+    with metrics.time("dedupe_check"):
+        for shard, rows in enumerate(partitions):
+            fingerprint = _fingerprint(rows)
+            if completed.get(shard) == fingerprint:
+                skipped += len(rows)
+                continue
+            # Contacts already messaged today through the normal (unsharded) sending are left out
+            to_send = [row for row in rows if not already_sent(row[1])]
+            skipped += len(rows) - len(to_send)
+            if to_send:
+                pending.append((shard, to_send, fingerprint))
+    metrics.inc("contacts_checked_total", len(contacts))
+
+    # Write out anything buffered here, so forked workers don't inherit and repeat it
+    get_log_writer().flush()
+
+    summary = {"sent": 0, "failed": 0, "skipped": skipped, "shards": shards,
+               "shards_run": len(pending), "workers": workers}
+    # Fork where the platform has it, so workers start quickly with the modules already imported
+    context = multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else None)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(sys.stdout is sys.stderr,)) as pool:
+        futures = [
+            pool.submit(_run_shard, shard, shards, rows, fingerprint, day,
+                        {row[1]: days[row[1]] for row in rows if row[1] in days}, ledger_path, concurrency, batch_size)
+            for shard, rows, fingerprint in pending
+        ]
+        for future in futures:
+            result = future.result()
+            summary["sent"] += result["sent"]
+            summary["failed"] += result["failed"]
+            summary["skipped"] += result["skipped"]
+            metrics.merge(result["metrics"])
+
+    metrics.inc("messages_skipped_total", summary["skipped"])
+    in_doubt = [email for claim_day in sorted({day, *days.values()}) for email in ledger.in_doubt(claim_day)]
+    summary["in_doubt"] = len(in_doubt)
+    summary["in_doubt_emails"] = in_doubt[:20]
+    ledger.close()
+    # Pick up what the workers logged
+    sent_index.refresh()
+    sent_index.save()
+    return summary
@@ -0,0 +1,159 @@
+# storage.py
+
+import csv
+import json
+import sqlite3
+from morning_greetings.contacts import Contact
+
+DB_FILE = "contacts.db"
+FIELDS = ["name", "email", "preferred_time", "timezone"]
+
+
+class SQLiteContactStore:
+    def __init__(self, path: str = DB_FILE, batch_size: int = 1000) -> None:
+        """Initiates the SQLiteContactStore, creating the contacts table in the database at path if needed."""
+        self.path = path
+        self.batch_size = batch_size
+        self.conn = sqlite3.connect(path)
+        self._pending = []  # (sql, params) waiting to be written in the next transaction
+
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS contacts ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "name TEXT NOT NULL, "
+                "email TEXT NOT NULL, "
+                "preferred_time TEXT NOT NULL, "
+                "timezone TEXT)"
+            )
+            self.conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_contacts_email ON contacts (email)")
+            # Databases created before contacts had a timezone
+            columns = {row[1] for row in self.conn.execute("PRAGMA table_info(contacts)")}
+            if "timezone" not in columns:
+                self.conn.execute("ALTER TABLE contacts ADD COLUMN timezone TEXT")
+
+    def load(self):
+        """Yields (name, email, preferred_time, timezone) for every stored contact in the order they were added."""
+        self.flush()
+        cursor = self.conn.execute("SELECT name, email, preferred_time, timezone FROM contacts ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(self.batch_size)
+            if not rows:
+                break
+            yield from rows
+
+    def on_change(self, event: str, c: Contact, old_email: str) -> None:
+        """ContactList listener that queues the change and writes a batch once enough have piled up."""
+        if event == "add":
+            self._pending.append((
+                "INSERT INTO contacts (name, email, preferred_time, timezone) VALUES (?, ?, ?, ?)",
+                (c.name, c.email, c.preferred_time, c.timezone),
+            ))
+        elif event == "update":
+            self._pending.append((
+                "UPDATE contacts SET name = ?, email = ?, preferred_time = ?, timezone = ? WHERE email = ?",
+                (c.name, c.email, c.preferred_time, c.timezone, old_email),
+            ))
+        elif event == "remove":
+            self._pending.append(("DELETE FROM contacts WHERE email = ?", (old_email,)))
+
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Writes all queued changes in a single transaction."""
+        if not self._pending:
+            return
+        with self.conn:
+            for sql, params in self._pending:
+                self.conn.execute(sql, params)
+        self._pending = []
+
+    def upsert_many(self, rows: list[tuple[str, str, str, str]]) -> None:
+        """Inserts (name, email, preferred_time, timezone) rows in one transaction, updating contacts whose email exists."""
+        self.flush()
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO contacts (name, email, preferred_time, timezone) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (email) DO UPDATE SET name = excluded.name, preferred_time = excluded.preferred_time, "
+                "timezone = excluded.timezone",
+                rows,
+            )
+
+    def close(self) -> None:
+        """Writes any queued changes and closes the database."""
+        self.flush()
+        self.conn.close()
+
+    def __len__(self) -> int:
+        self.flush()
+        return self.conn.execute("SELECT COUNT(*) FROM contacts").fetchone()[0]
+
+
+def _read_rows(path: str):
+    """Yields (line number, row dict) from a CSV or JSONL file, one line at a time."""
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for line_no, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    row = e
+                yield line_no, row
+        else:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+
+
+def import_contacts(path: str, store: SQLiteContactStore, chunk_size: int = 10000,
+                    max_errors: int = 20) -> tuple[int, int, list]:
+    """Streams contacts from a CSV or JSONL file into the store, validating and writing chunk_size rows at a time.
+
+    Returns the number of imported contacts, the number of rows that were skipped, and (line number, error)
+    for the first max_errors of them. Only those are kept, since a bad file can have millions of them."""
+    imported = rejected = 0
+    errors = []
+    chunk = []
+
+    for line_no, row in _read_rows(path):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError(f"Invalid row: {row}")
+            c = Contact(row.get("name"), row.get("email") or "", row.get("preferred_time") or "08:00 AM",
+                        row.get("timezone") or None)
+        except (ValueError, TypeError) as e:
+            rejected += 1
+            if len(errors) < max_errors:
+                errors.append((line_no, str(e)))
+            continue
+
+        chunk.append((c.name, c.email, c.preferred_time, c.timezone))
+        if len(chunk) >= chunk_size:
+            store.upsert_many(chunk)
+            imported += len(chunk)
+            chunk = []
+
+    if chunk:
+        store.upsert_many(chunk)
+        imported += len(chunk)
+    return imported, rejected, errors
+
+
+def export_contacts(path: str, store: SQLiteContactStore) -> int:
+    """Streams all stored contacts to a CSV or JSONL file and returns how many were written."""
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            for row in store.load():
+                f.write(json.dumps(dict(zip(FIELDS, row))) + "\n")
+                count += 1
+        else:
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            for row in store.load():
+                writer.writerow(row)
+                count += 1
+    return count
@@ -0,0 +1,123 @@
+# templates.py
+
+import json
+import os
+from operator import attrgetter
+from string import Formatter
+from morning_greetings.contacts import Contact
+
+TEMPLATES_FILE = "greetings.json"
+BANDS = ("morning", "afternoon", "evening")
+FIELDS = ("name", "email", "preferred_time")
+
+DEFAULT_TEMPLATES = {
+    "en": {
+        "morning": "Good morning {name}, hope you have a great day!",
+        "afternoon": "Good afternoon {name}, hope you're having a productive day!",
+        "evening": "Good evening {name}, hope you're winding down and relaxing!",
+    },
+    "nb": {
+        "morning": "God morgen {name}, håper du får en fin dag!",
+        "afternoon": "God ettermiddag {name}, håper dagen går bra!",
+        "evening": "God kveld {name}, håper du får slappet av!",
+    },
+}
+
+
+class CompiledTemplate:
+    def __init__(self, template: str) -> None:
+        """Compiles a template with {name}, {email} and {preferred_time} fields into a %-format string."""
+        self.template = template
+        parts, fields = [], []
+        for literal, field, spec, conversion in Formatter().parse(template):
+            parts.append(literal.replace("%", "%%"))
+            if field is None:
+                continue
+            if field not in FIELDS or spec or conversion:
+                raise ValueError(f"Invalid template field: {{{field}}}. Expected one of {', '.join(FIELDS)}.")
+            parts.append("%s")
+            fields.append(field)
+
+        self._format = "".join(parts)
+        # attrgetter returns a single value for one field and a tuple for several
+        self._getter = attrgetter(*fields) if len(fields) > 1 else None
+        self._field = fields[0] if len(fields) == 1 else None
+
+    def render(self, c: Contact) -> str:
+        """Fills in the template for a contact."""
+        if self._getter is not None:
+            return self._format % self._getter(c)
+        if self._field is not None:
+            return self._format % (getattr(c, self._field),)
+        return self._format
+
+    def render_many(self, contacts: list[Contact]) -> list[str]:
+        """Fills in the template for every contact in one pass."""
+        fmt = self._format
+        if self._getter is not None:
+            getter = self._getter
+            return [fmt % getter(c) for c in contacts]
+        if self._field is not None:
+            getter = attrgetter(self._field)
+            return [fmt % (getter(c),) for c in contacts]
+        return [fmt] * len(contacts)
+
+
+class TemplateEngine:
+    def __init__(self, templates: dict = None, locale: str = "en") -> None:
+        """Initiates the TemplateEngine with templates as {locale: {band: template}}, compiling each template once."""
+        templates = templates or DEFAULT_TEMPLATES
+        if locale not in templates:
+            raise ValueError(f"No templates for locale: {locale}.")
+        self.locale = locale
+        self.compiled = {}
+        for loc, bands in templates.items():
+            for band in BANDS:
+                # A locale may leave out a band, the default locale's template is used instead
+                template = bands.get(band) or templates[locale].get(band)
+                if template is None:
+                    raise ValueError(f"No {band} template for locale: {loc}.")
+                self.compiled[loc, band] = CompiledTemplate(template)
+
+    @classmethod
+    def from_file(cls, path: str, locale: str = "en") -> "TemplateEngine":
+        """Creates a TemplateEngine from a JSON file with {locale: {band: template}}."""
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), locale)
+
+    def render(self, c: Contact, locale: str = None) -> str:
+        """Returns the greeting for a contact, picked by the contact's time band."""
+        return self.compiled[locale or self.locale, c.time_band].render(c)
+
+    def render_batch(self, contacts: list[Contact], locale: str = None) -> list[str]:
+        """Returns the greetings for a list of contacts, in the same order."""
+        locale = locale or self.locale
+        # Group by band so each compiled template renders all of its contacts at once
+        groups = {band: [] for band in BANDS}
+        for i, c in enumerate(contacts):
+            groups[c.time_band].append(i)
+
+        messages = [None] * len(contacts)
+        for band, indexes in groups.items():
+            if not indexes:
+                continue
+            rendered = self.compiled[locale, band].render_many([contacts[i] for i in indexes])
+            for i, msg in zip(indexes, rendered):
+                messages[i] = msg
+        return messages
+
+
+_engine = None
+
+
+def get_engine() -> TemplateEngine:
+    """Returns the shared TemplateEngine, loading greetings.json (or MORNING_GREETINGS_TEMPLATES) if it exists."""
+    global _engine
+    if _engine is None:
+        path = os.environ.get("MORNING_GREETINGS_TEMPLATES", TEMPLATES_FILE)
+        locale = os.environ.get("MORNING_GREETINGS_LOCALE", "en")
+        if os.path.exists(path):
+            _engine = TemplateEngine.from_file(path, locale)
+        else:
+            _engine = TemplateEngine(locale=locale)
+    return _engine
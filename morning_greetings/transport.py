@@ -0,0 +1,136 @@
+# transport.py
+
+import os
+import queue
+from morning_greetings.contacts import Contact
+
+
+class Transport:
+    """Base class for the ways a message can be delivered. Subclasses implement send()."""
+
+    def send(self, c: Contact, msg: str) -> None:
+        """Delivers msg to the contact, raising an exception if it fails."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Releases any connections held by the transport."""
+
+    def is_transient(self, error: Exception) -> bool:
+        """Returns True if sending again later might succeed."""
+        return isinstance(error, OSError)
+
+
+class PrintTransport(Transport):
+    """Prints the message instead of sending it."""
+
+    def send(self, c: Contact, msg: str) -> None:
+        print(f"Sending message to {c.email}: {msg}")
+
+
+class SMTPTransport(Transport):
+    """Sends messages by email through an SMTP server, reusing connections between sends.
+
+    smtplib is imported when the transport is used, since it is slow to import and most
+    runs only print."""
+
+    def __init__(self, host: str = "localhost", port: int = 25, sender: str = "greetings@localhost",
+                 subject: str = "Greetings", username: str = None, password: str = None,
+                 starttls: bool = False, timeout: float = 10, pool_size: int = 8) -> None:
+        """Initiates the SMTPTransport with the server settings and how many idle connections to keep."""
+        self.host = host
+        self.port = port
+        self.sender = sender
+        self.subject = subject
+        self.username = username
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        # Idle connections; a sending thread takes one out and puts it back when done
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _connect(self):
+        import smtplib
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            conn.starttls()
+        if self.username:
+            conn.login(self.username, self.password)
+        return conn
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def _release(self, conn) -> None:
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            self._quit(conn)
+
+    def _quit(self, conn) -> None:
+        import smtplib
+        try:
+            conn.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.close()
+
+    def send(self, c: Contact, msg: str) -> None:
+        import smtplib
+        from email.message import EmailMessage
+
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = c.email
+        message["Subject"] = self.subject
+        message.set_content(msg)
+
+        conn = self._acquire()
+        try:
+            conn.send_message(message)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # The connection is broken, don't put it back in the pool
+            conn.close()
+            raise
+        except smtplib.SMTPException:
+            self._release(conn)
+            raise
+        self._release(conn)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._quit(self._pool.get_nowait())
+            except queue.Empty:
+                break
+
+    def is_transient(self, error: Exception) -> bool:
+        import smtplib
+        # 4xx replies are temporary failures, 5xx are permanent
+        if isinstance(error, smtplib.SMTPRecipientsRefused):
+            return all(400 <= code < 500 for code, _ in error.recipients.values())
+        if isinstance(error, smtplib.SMTPResponseException):
+            return 400 <= error.smtp_code < 500
+        return isinstance(error, (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError))
+
+
+def transport_from_env(concurrency: int = None) -> Transport:
+    """Returns an SMTPTransport if MORNING_GREETINGS_SMTP_HOST is set, otherwise a PrintTransport.
+
+    The SMTP connection pool holds as many connections as messages are sent at once (concurrency,
+    or MORNING_GREETINGS_CONCURRENCY), so every sending thread can reuse its connection."""
+    host = os.environ.get("MORNING_GREETINGS_SMTP_HOST")
+    if not host:
+        return PrintTransport()
+    if concurrency is None:
+        concurrency = int(os.environ.get("MORNING_GREETINGS_CONCURRENCY", "8"))
+    return SMTPTransport(
+        host=host,
+        port=int(os.environ.get("MORNING_GREETINGS_SMTP_PORT", "25")),
+        sender=os.environ.get("MORNING_GREETINGS_SMTP_SENDER", "greetings@localhost"),
+        username=os.environ.get("MORNING_GREETINGS_SMTP_USER"),
+        password=os.environ.get("MORNING_GREETINGS_SMTP_PASSWORD"),
+        starttls=os.environ.get("MORNING_GREETINGS_SMTP_STARTTLS", "") == "1",
+        pool_size=max(concurrency, 1),
+    )
@@ -4,10 +4,15 @@ setup(
     name="morning_greetings",  # The name of your package
     version="0.1",
     packages=find_packages(),  # Automatically find all packages in your project
-    install_requires=[],  # Add any dependencies here, e.g. ['schedule', 'requests']
+    install_requires=[
+        'tzdata; platform_system == "Windows"',  # zoneinfo has no system timezone database on Windows
+    ],
+    extras_require={
+        'fast': ['numpy'],  # Columnar ContactBatch in morning_greetings.contact_batch
+    },
     entry_points={
         'console_scripts': [
-            'morning_greetings = morning_greetings.main:main',  # The command 'morning_greetings' will call main()
+            'morning_greetings = morning_greetings.cli:main',  # The command 'morning_greetings' will call main()
         ],
     },
     author="Your Name",
@@ -20,5 +25,5 @@ setup(
         'License :: OSI Approved :: MIT License',
         'Operating System :: OS Independent',
     ],
-    python_requires='>=3.6',
+    python_requires='>=3.9',
 )
\ No newline at end of file
@@ -0,0 +1,80 @@
+# test_scheduling.py
+#
+# send_appropriate_messages around midnight, where a contact's send window and the
+# server's calendar day disagree. Each pass gets a new scheduler, like a cron run.
+
+from datetime import date, datetime, time, timedelta
+
+import pytest
+
+from morning_greetings import logger, sent_index
+from morning_greetings.contacts import Contact, ContactList
+from morning_greetings.ledger import SendLedger
+from morning_greetings.main import send_appropriate_messages
+from morning_greetings.scheduler import SendScheduler
+from morning_greetings.transport import Transport
+
+TODAY = date.today()
+YESTERDAY = TODAY - timedelta(days=1)
+
+
+class RecordingTransport(Transport):
+    """Accepts every message and remembers who it was for."""
+
+    def __init__(self) -> None:
+        self.sent = []
+
+    def send(self, c: Contact, msg: str) -> None:
+        self.sent.append(c.email)
+
+
+def at(day: date, hour: int, minute: int) -> datetime:
+    return datetime.combine(day, time(hour, minute))
+
+
+@pytest.fixture
+def contacts(tmp_path, monkeypatch):
+    # Keep the log, sent-index and ledger out of the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(logger, "_log_writer", logger.LogWriter(str(tmp_path / "log.txt")))
+    monkeypatch.setattr(sent_index, "_sent_index", None)
+    contact_list = ContactList()
+    contact_list.add_contact("Late", "late@example.com", "11:55 PM")
+    contact_list.add_contact("Early", "early@example.com", "12:05 AM")
+    yield contact_list
+    logger._log_writer.close()
+
+
+def send_pass(contact_list: ContactList, now: datetime) -> list[str]:
+    transport = RecordingTransport()
+    scheduler = SendScheduler(contact_list, now - timedelta(minutes=1))
+    try:
+        send_appropriate_messages(contact_list, scheduler, transport, concurrency=2, now=now)
+    finally:
+        scheduler.close()
+    return transport.sent
+
+
+def test_window_sent_before_midnight_is_not_sent_again_after(contacts):
+    # Sent at 23:56 in the 11:55 PM window (yesterday's) and the 12:05 AM window (today's)...
+    ledger = SendLedger()
+    for day, email in ((YESTERDAY, "late@example.com"), (TODAY, "early@example.com")):
+        ledger.claim_many(day.isoformat(), [email])
+        ledger.mark_sent(day.isoformat(), [email])
+        sent_index.get_sent_index().add(email, YESTERDAY, at(YESTERDAY, 23, 56).timestamp())
+    ledger.close()
+
+    # ...so a pass in the same windows just after midnight leaves them out
+    assert send_pass(contacts, at(TODAY, 0, 5)) == []
+
+
+def test_window_after_a_send_past_midnight_is_still_sent(contacts):
+    # Yesterday's 11:55 PM window was sent at 00:05 today, and claimed for yesterday
+    ledger = SendLedger()
+    ledger.claim_many(YESTERDAY.isoformat(), ["late@example.com"])
+    ledger.mark_sent(YESTERDAY.isoformat(), ["late@example.com"])
+    ledger.close()
+    sent_index.get_sent_index().add("late@example.com", TODAY, at(TODAY, 0, 5).timestamp())
+
+    # Today's 11:55 PM window is a different send, even though the date is the same
+    assert send_pass(contacts, at(TODAY, 23, 45)) == ["late@example.com"]
@@ -0,0 +1,83 @@
+# test_transport.py
+#
+# SMTPTransport and dispatch() against a local aiosmtpd server that answers each
+# recipient with a chosen reply code.
+
+import socket
+
+import pytest
+
+pytest.importorskip("aiosmtpd")
+
+from aiosmtpd.controller import Controller
+
+from morning_greetings import logger, sent_index
+from morning_greetings.contacts import Contact
+from morning_greetings.dispatcher import dispatch
+from morning_greetings.transport import SMTPTransport
+
+
+class ReplyHandler:
+    """Accepts ok@ recipients, refuses temp@ with 451 until it has been tried `temp_failures` times,
+    and always refuses bad@ with 550."""
+
+    def __init__(self, temp_failures: int) -> None:
+        self.temp_failures = temp_failures
+        self.attempts = {}
+        self.delivered = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        self.attempts[address] = self.attempts.get(address, 0) + 1
+        if address.startswith("bad@"):
+            return "550 No such user"
+        if address.startswith("temp@") and self.attempts[address] <= self.temp_failures:
+            return "451 Try again later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.delivered.extend(envelope.rcpt_tos)
+        return "250 Message accepted"
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server(tmp_path, monkeypatch):
+    # Sent messages are logged, so keep the log and sent-index out of the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(logger, "_log_writer", logger.LogWriter(str(tmp_path / "log.txt")))
+    monkeypatch.setattr(sent_index, "_sent_index", None)
+
+    handler = ReplyHandler(temp_failures=2)
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield handler, controller
+    controller.stop()
+    logger._log_writer.close()
+
+
+def test_smtp_replies(smtp_server):
+    handler, controller = smtp_server
+    transport = SMTPTransport(host=controller.hostname, port=controller.port, timeout=5)
+    jobs = [(Contact("Ok", "ok@example.com"), "Good morning Ok!"),
+            (Contact("Temp", "temp@example.com"), "Good morning Temp!"),
+            (Contact("Bad", "bad@example.com"), "Good morning Bad!")]
+    try:
+        summary = dispatch(jobs, transport, concurrency=3, retries=3, backoff=0)
+    finally:
+        transport.close()
+
+    # 250: delivered on the first try
+    assert handler.attempts["ok@example.com"] == 1
+    # 451: temporary, so retried until the server accepts it
+    assert handler.attempts["temp@example.com"] == 3
+    assert sorted(handler.delivered) == ["ok@example.com", "temp@example.com"]
+    # 550: permanent, reported as failed without retrying
+    assert handler.attempts["bad@example.com"] == 1
+    assert summary.sent == 2
+    assert [c.email for c, _ in summary.failed] == ["bad@example.com"]